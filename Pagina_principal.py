@@ -14,11 +14,21 @@ if BASE_DIR not in sys.path:
     sys.path.append(BASE_DIR)
 
 import utilidades as util
+import precarga
+import memoria_sesion as memoria
 
 # CONFIGURACIÓN INICIAL
 
 st.set_page_config(page_title="Simulación Bursátil", layout="wide")
 
+# PRECARGA EN SEGUNDO PLANO (una sola vez por proceso)
+
+servicio_precarga = precarga.iniciar_precarga()
+
+# MEMORIA POR SESIÓN (actividad y desalojo de sesiones inactivas)
+
+memoria.tocar()
+
 # BASE DE DATOS
 
 conn = sqlite3.connect("jugadores.db")
@@ -103,6 +113,11 @@ else:
             unsafe_allow_html=True
         )
 
+        with st.expander("Estado de la precarga de datos"):
+            estado = "terminada" if servicio_precarga.terminada else "en curso"
+            st.write(f"Precarga {estado}: {servicio_precarga.tiempo_total():.1f} s")
+            st.dataframe(servicio_precarga.reporte(), hide_index=True)
+
     # ------------------------
     # OTRAS PÁGINAS
     # ------------------------
@@ -124,5 +139,10 @@ else:
                 spec = importlib.util.spec_from_file_location("pagina", page_path)
                 pagina = importlib.util.module_from_spec(spec)
                 sys.modules["pagina"] = pagina
-                spec.loader.exec_module(pagina)
+                try:
+                    spec.loader.exec_module(pagina)
+                finally:
+                    # Sin esto el módulo de la última página (y sus DataFrames)
+                    # queda vivo en sys.modules para todo el proceso.
+                    sys.modules.pop("pagina", None)
 
@@ -0,0 +1,150 @@
+# actualizacion_datos.py
+"""
+Actualización incremental de los históricos: por cada ticker se piden solo las
+barras posteriores a la última fecha guardada y se agregan al CSV de forma atómica.
+
+Uso por consola:
+    python actualizacion_datos.py acciones_procesadas --fuente yfinance
+    python actualizacion_datos.py Acciones_2024 --fuente carpeta --carpeta-origen nuevos_csv
+"""
+import os
+import shutil
+import argparse
+import pandas as pd
+
+import datos_acciones as da
+
+
+# -----------------------
+# Fuentes de datos
+# -----------------------
+class FuenteYFinance:
+    """Descarga barras diarias desde Yahoo Finance."""
+
+    def obtener(self, ticker, desde):
+        import yfinance as yf
+
+        if pd.isna(desde):
+            df = yf.Ticker(ticker).history(period="max", auto_adjust=False)
+        else:
+            inicio = (desde + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+            df = yf.Ticker(ticker).history(start=inicio, auto_adjust=False)
+        if df.empty:
+            return df
+        df = df.reset_index()
+        df["Date"] = pd.to_datetime(df["Date"]).dt.tz_localize(None).dt.normalize()
+        return df[["Date", "Open", "High", "Low", "Close", "Adj Close", "Volume"]]
+
+
+class FuenteCarpetaCSV:
+    """Lee barras nuevas desde una carpeta local con archivos <TICKER>.csv."""
+
+    def __init__(self, carpeta):
+        self.carpeta = carpeta
+
+    def obtener(self, ticker, desde):
+        ruta = os.path.join(self.carpeta, f"{ticker}.csv")
+        if not os.path.exists(ruta):
+            return pd.DataFrame()
+        return pd.read_csv(ruta, parse_dates=["Date"])
+
+
+FUENTES = {
+    "yfinance": FuenteYFinance,
+    "carpeta": FuenteCarpetaCSV,
+}
+
+
+# -----------------------
+# Actualización
+# -----------------------
+def _alinear_columnas(nuevas, columnas, ultimo_precio):
+    """Reordena las barras nuevas con las columnas del CSV existente."""
+    nuevas = nuevas.copy()
+    if "Adj_Close" in columnas and "Adj Close" in nuevas.columns:
+        nuevas = nuevas.rename(columns={"Adj Close": "Adj_Close"})
+    if "Return" in columnas and "Return" not in nuevas.columns:
+        col_precio = "Adj_Close" if "Adj_Close" in columnas else "Adj Close"
+        precios = pd.concat([pd.Series([ultimo_precio]), nuevas[col_precio].reset_index(drop=True)])
+        nuevas["Return"] = (precios.pct_change() * 100).iloc[1:].to_numpy()
+    return nuevas.reindex(columns=columnas)
+
+
+def _agregar_atomico(ruta, filas):
+    """Agrega 'filas' al CSV: escribe sobre una copia y la reemplaza en un solo paso."""
+    tmp = ruta + ".tmp"
+    shutil.copyfile(ruta, tmp)
+    with open(tmp, "rb+") as f:
+        # asegurar salto de línea final antes de agregar
+        f.seek(0, os.SEEK_END)
+        if f.tell() > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+    filas.to_csv(tmp, mode="a", header=False, index=False, date_format="%Y-%m-%d")
+    os.replace(tmp, ruta)
+
+
+def actualizar_ticker(ticker, ruta, fuente):
+    """Trae y agrega las barras posteriores a la última fecha guardada. Devuelve cuántas agregó."""
+    actual = pd.read_csv(ruta, parse_dates=["Date"])
+    desde = actual["Date"].max()
+    nuevas = fuente.obtener(ticker, desde)
+    if nuevas is None or nuevas.empty:
+        return 0
+
+    nuevas["Date"] = pd.to_datetime(nuevas["Date"])
+    if not pd.isna(desde):
+        nuevas = nuevas[nuevas["Date"] > desde]
+    nuevas = nuevas.drop_duplicates("Date").sort_values("Date")
+    if nuevas.empty:
+        return 0
+
+    ultimo_precio = None
+    for col in ("Adj Close", "Adj_Close"):
+        if col in actual.columns and not actual.empty:
+            ultimo_precio = actual.sort_values("Date")[col].iloc[-1]
+
+    _agregar_atomico(ruta, _alinear_columnas(nuevas, actual.columns.tolist(), ultimo_precio))
+    return len(nuevas)
+
+
+def actualizar_carpeta(carpeta, fuente, tickers=None, on_cambio=None):
+    """
+    Actualiza todos los tickers de 'carpeta' (o solo 'tickers').
+    Devuelve (cambios, errores): {ticker: barras_agregadas} y {ticker: mensaje}.
+    'on_cambio(cambiados)' se llama al final con los tickers modificados, para
+    invalidar únicamente lo que depende de ellos.
+    """
+    rutas = da.tickers_en_carpeta(carpeta)
+    if tickers is not None:
+        rutas = {t: r for t, r in rutas.items() if t in set(tickers)}
+
+    cambios, errores = {}, {}
+    for ticker, ruta in rutas.items():
+        try:
+            n = actualizar_ticker(ticker, ruta, fuente)
+        except Exception as e:
+            errores[ticker] = str(e)
+            continue
+        if n:
+            cambios[ticker] = n
+
+    if cambios and on_cambio is not None:
+        on_cambio(list(cambios))
+    return cambios, errores
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Actualiza los históricos con las barras nuevas.")
+    parser.add_argument("carpeta", help="Carpeta con los CSV por ticker")
+    parser.add_argument("--fuente", choices=sorted(FUENTES), default="yfinance")
+    parser.add_argument("--carpeta-origen", help="Carpeta con CSV nuevos (fuente 'carpeta')")
+    parser.add_argument("--tickers", nargs="*", help="Limitar a estos tickers")
+    args = parser.parse_args()
+
+    fuente = FuenteCarpetaCSV(args.carpeta_origen) if args.fuente == "carpeta" else FuenteYFinance()
+    cambios, errores = actualizar_carpeta(args.carpeta, fuente, args.tickers)
+    print(f"{len(cambios)} tickers actualizados, {sum(cambios.values())} barras nuevas.")
+    for t, msg in errores.items():
+        print(f"  Error en {t}: {msg}")
@@ -0,0 +1,138 @@
+# cargas.py
+import os
+import io
+import zipfile
+import threading
+import requests
+import gdown
+import pandas as pd
+import streamlit as st
+
+import datos_acciones as da
+import estadisticas_tickers as et
+import montecarlo as mc
+import panel_precios as pp
+import validacion_portafolio as vp
+from drive_zip_utils import download_and_unzip_from_drive
+
+# ================================
+# ORÍGENES DE DATOS
+# ================================
+# Históricos completos (Pagina A)
+HISTORICOS_ZIP_ID = "1UrY3VOcpirbthISl0bnve6E8OP_-3vym"
+HISTORICOS_CARPETA = "acciones_procesadas"
+HISTORICOS_ZIP = "acciones_procesadas.zip"
+
+# Precios 2024 para la simulación (Pagina C)
+SIMULACION_ZIP_URL = "https://drive.google.com/uc?id=1sgshq-1MLrO1oToV8uu-iM4SPnvgT149"
+SIMULACION_ZIP = "acciones_2024.zip"
+SIMULACION_CARPETA = "Acciones_2024"
+
+# Libro de portafolios y frontera eficiente (Pagina B)
+LIBRO_SHEET_ID = "19xIH0ipdUYg0XELl4mHBLcNbmQ5vxQcL"
+FRONTERA_FILE_ID = "1XL0NNwTscC4Pxgs0oRZ8ofVwxyuXhajY"
+
+# Un candado por conjunto de datos: la precarga y una página nunca descargan
+# el mismo archivo a la vez.
+_candados = {n: threading.Lock() for n in ("historicos", "simulacion", "estadisticas", "panel")}
+
+
+# ================================
+# DESCARGAS A DISCO
+# ================================
+def historicos_listos():
+    return os.path.exists(HISTORICOS_CARPETA) and len(os.listdir(HISTORICOS_CARPETA)) > 0
+
+
+def asegurar_historicos():
+    """Descarga y extrae los históricos completos si aún no están en disco."""
+    with _candados["historicos"]:
+        if not historicos_listos():
+            download_and_unzip_from_drive(HISTORICOS_ZIP_ID, HISTORICOS_CARPETA, HISTORICOS_ZIP, quiet=True)
+    return da.tickers_en_carpeta(HISTORICOS_CARPETA)
+
+
+def asegurar_simulacion():
+    """Descarga y extrae el ZIP de precios 2024 si aún no está en disco."""
+    with _candados["simulacion"]:
+        if not os.path.exists(SIMULACION_ZIP):
+            gdown.download(SIMULACION_ZIP_URL, SIMULACION_ZIP, quiet=True)
+        if not os.path.exists(SIMULACION_CARPETA):
+            with zipfile.ZipFile(SIMULACION_ZIP, "r") as zip_ref:
+                zip_ref.extractall(".")
+
+
+def asegurar_estadisticas(tickers, esperar=True):
+    """
+    Genera o pone al día la tabla del screener (solo recalcula los CSV nuevos o
+    modificados). Con esperar=False no se bloquea si otro hilo la está
+    generando y devuelve False.
+    """
+    if not _candados["estadisticas"].acquire(blocking=esperar):
+        return False
+    try:
+        et.actualizar_estadisticas(tickers)
+    finally:
+        _candados["estadisticas"].release()
+    return True
+
+
+def asegurar_panel():
+    """Alinea los precios 2024 al calendario de negociación (solo relee los CSV que cambiaron)."""
+    asegurar_simulacion()
+    with _candados["panel"]:
+        pp.actualizar_panel(SIMULACION_CARPETA, pp.ARCHIVO_PANEL)
+    return da.version_archivo(pp.ARCHIVO_PANEL)
+
+
+# ================================
+# CACHÉS COMPARTIDAS ENTRE SESIONES
+# ================================
+# La versión del archivo forma parte de la clave: al actualizar un ticker
+# solo se invalida su entrada.
+@st.cache_data(max_entries=64, show_spinner=False)
+def leer_ticker(ruta, version):
+    return pd.read_csv(ruta)
+
+
+@st.cache_data(show_spinner=False)
+def cargar_estadisticas(version):
+    return et.leer_estadisticas()
+
+
+@st.cache_resource(show_spinner="Indexando tickers disponibles...")
+def cargar_indice_tickers():
+    return vp.construir_indice_tickers(SIMULACION_CARPETA)
+
+
+@st.cache_resource(max_entries=2, show_spinner="Cargando panel de precios...")
+def cargar_panel(version):
+    return pp.PanelPrecios.cargar(pp.ARCHIVO_PANEL)
+
+
+def panel_precios():
+    """Panel de precios 2024 al día, compartido entre sesiones."""
+    return cargar_panel(asegurar_panel())
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def cargar_momentos(tickers, version):
+    """Retorno medio y covarianza diarios de 'tickers' según el panel 2024 (versión 'version')."""
+    panel = cargar_panel(version)
+    return mc.momentos(panel.tomar(list(tickers)), panel.tomar_cobertura(list(tickers)))
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def cargar_libro_portafolios():
+    """Todas las hojas del libro de Google Sheets con los portafolios de ejemplo."""
+    url_excel = f"https://docs.google.com/spreadsheets/d/{LIBRO_SHEET_ID}/export?format=xlsx"
+    return pd.read_excel(url_excel, sheet_name=None, engine="openpyxl")
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def cargar_frontera():
+    """frontier.csv desde el ZIP de Drive, leído en memoria."""
+    resp = requests.get(f"https://drive.google.com/uc?id={FRONTERA_FILE_ID}")
+    with zipfile.ZipFile(io.BytesIO(resp.content)) as z:
+        with z.open("frontier.csv") as f:
+            return pd.read_csv(f)
@@ -0,0 +1,36 @@
+# datos_acciones.py
+import os
+
+
+def tickers_en_carpeta(carpeta):
+    """
+    Recorre 'carpeta' y devuelve {ticker: ruta_csv}.
+    El ticker es el nombre del archivo hasta el primer '_' (p. ej. AAPL_2024.csv -> AAPL).
+    """
+    archivos = []
+    for root, _, files in os.walk(carpeta):
+        for f in files:
+            if f.endswith(".csv"):
+                archivos.append(os.path.join(root, f))
+
+    tickers = {}
+    for f in sorted(archivos):
+        nombre = os.path.splitext(os.path.basename(f))[0]
+        nombre = nombre.split("_")[0]
+        if nombre not in tickers:  # evita duplicados
+            tickers[nombre] = f
+    return tickers
+
+
+def csv_de_carpeta(carpeta):
+    """Produce (TICKER, ruta) para cada <TICKER>.csv directamente en 'carpeta'."""
+    for f in sorted(os.listdir(carpeta)):
+        if f.endswith(".csv"):
+            yield os.path.splitext(f)[0].strip().upper(), os.path.join(carpeta, f)
+
+
+def version_archivo(ruta):
+    """Versión de un CSV en disco (cambia cada vez que el archivo se reescribe)."""
+    info = os.stat(ruta)
+    return f"{info.st_mtime_ns}-{info.st_size}"
+
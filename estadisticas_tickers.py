@@ -0,0 +1,188 @@
+# estadisticas_tickers.py
+import os
+import numpy as np
+import pandas as pd
+
+import ingesta
+from utilidades import TASA_RF_ANUAL
+
+ARCHIVO_ESTADISTICAS = "estadisticas_tickers.csv"
+DIAS_HABILES = 252
+
+COLUMNAS = [
+    "Ticker", "RentabilidadAnualizada", "Volatilidad", "Sharpe", "MaxDrawdown",
+    "VolumenPromedio", "FechaInicio", "FechaFin", "Dias", "Version"
+]
+
+
+def estadisticas_ticker(df, tasa_rf=TASA_RF_ANUAL):
+    """
+    Calcula las estadísticas de un histórico (columnas Date, Adj Close, Volume).
+    Usa las mismas convenciones que la simulación: 252 días y retorno medio compuesto.
+    """
+    if "Adj Close" not in df.columns and "Adj_Close" in df.columns:
+        df = df.rename(columns={"Adj_Close": "Adj Close"})
+    df = df.dropna(subset=["Date", "Adj Close"]).sort_values("Date")
+    precios = df["Adj Close"].to_numpy(dtype=float)
+
+    if len(precios) > 1:
+        retornos = precios[1:] / precios[:-1] - 1
+        rent_anual = (1 + retornos.mean()) ** DIAS_HABILES - 1
+        volatilidad = retornos.std(ddof=1) * np.sqrt(DIAS_HABILES)
+        sharpe = (rent_anual - tasa_rf) / volatilidad if volatilidad > 0 else 0.0
+        max_drawdown = (precios / np.maximum.accumulate(precios) - 1).min()
+    else:
+        rent_anual = volatilidad = sharpe = max_drawdown = np.nan
+
+    volumen = df["Volume"].mean() if "Volume" in df.columns else np.nan
+    return {
+        "RentabilidadAnualizada": rent_anual,
+        "Volatilidad": volatilidad,
+        "Sharpe": sharpe,
+        "MaxDrawdown": max_drawdown,
+        "VolumenPromedio": volumen,
+        "FechaInicio": df["Date"].iloc[0] if len(df) else pd.NaT,
+        "FechaFin": df["Date"].iloc[-1] if len(df) else pd.NaT,
+        "Dias": len(df),
+    }
+
+
+def leer_estadisticas(archivo=ARCHIVO_ESTADISTICAS):
+    """Lee la tabla precalculada (vacía si todavía no existe)."""
+    if not os.path.exists(archivo):
+        return pd.DataFrame(columns=COLUMNAS)
+    return pd.read_csv(archivo, parse_dates=["FechaInicio", "FechaFin"], dtype={"Version": str})
+
+
+class _Acumulador:
+    """
+    Las mismas estadísticas que estadisticas_ticker, calculadas bloque a bloque
+    (histórico en orden cronológico): conteo, media y suma de cuadrados de los
+    retornos (Welford por bloques), pico para el drawdown y suma del volumen.
+    """
+
+    def __init__(self):
+        self.dias = 0
+        self.n = 0
+        self.media = 0.0
+        self.m2 = 0.0
+        self.ultimo = None
+        self.pico = -np.inf
+        self.max_drawdown = 0.0
+        self.volumen_suma = 0.0
+        self.volumen_n = 0
+        self.inicio = pd.NaT
+        self.fin = pd.NaT
+
+    def agregar(self, bloque):
+        if "Adj Close" not in bloque.columns and "Adj_Close" in bloque.columns:
+            bloque = bloque.rename(columns={"Adj_Close": "Adj Close"})
+        bloque = bloque.assign(Date=pd.to_datetime(bloque["Date"], errors="coerce"))
+        bloque = bloque.dropna(subset=["Date", "Adj Close"])
+        if bloque.empty:
+            return
+        fechas = bloque["Date"]
+        if not fechas.is_monotonic_increasing or (self.dias and fechas.iloc[0] < self.fin):
+            raise _Desordenado()
+
+        precios = bloque["Adj Close"].to_numpy(dtype=float)
+        previos = precios if self.ultimo is None else np.r_[self.ultimo, precios]
+        retornos = previos[1:] / previos[:-1] - 1
+        if len(retornos):
+            n_b, media_b = len(retornos), retornos.mean()
+            delta = media_b - self.media
+            total = self.n + n_b
+            self.m2 += ((retornos - media_b) ** 2).sum() + delta ** 2 * self.n * n_b / total
+            self.media += delta * n_b / total
+            self.n = total
+
+        picos = np.maximum.accumulate(np.r_[self.pico, precios])[1:]
+        self.max_drawdown = min(self.max_drawdown, (precios / picos - 1).min())
+        self.pico = picos[-1]
+        self.ultimo = precios[-1]
+
+        if "Volume" in bloque.columns:
+            self.volumen_suma += bloque["Volume"].sum()
+            self.volumen_n += int(bloque["Volume"].count())
+        if not self.dias:
+            self.inicio = fechas.iloc[0]
+        self.fin = fechas.iloc[-1]
+        self.dias += len(bloque)
+
+    def resultado(self, tasa_rf):
+        if self.dias > 1:
+            rent_anual = (1 + self.media) ** DIAS_HABILES - 1
+            volatilidad = np.sqrt(self.m2 / (self.n - 1)) * np.sqrt(DIAS_HABILES) if self.n > 1 else np.nan
+            sharpe = (rent_anual - tasa_rf) / volatilidad if volatilidad > 0 else 0.0
+            max_drawdown = self.max_drawdown
+        else:
+            rent_anual = volatilidad = sharpe = max_drawdown = np.nan
+        return {
+            "RentabilidadAnualizada": rent_anual,
+            "Volatilidad": volatilidad,
+            "Sharpe": sharpe,
+            "MaxDrawdown": max_drawdown,
+            "VolumenPromedio": self.volumen_suma / self.volumen_n if self.volumen_n else np.nan,
+            "FechaInicio": self.inicio,
+            "FechaFin": self.fin,
+            "Dias": self.dias,
+        }
+
+
+class _Desordenado(Exception):
+    pass
+
+
+def _estadisticas_fuente(fuente, tasa_rf, tamano_bloque):
+    # Corre en los procesos de la ingesta: en memoria nunca hay más de un bloque
+    columnas = ("Date", "Adj Close", "Adj_Close", "Volume")
+    acumulador = _Acumulador()
+    try:
+        for bloque in ingesta.iterar_bloques(fuente, columnas, tamano_bloque):
+            acumulador.agregar(bloque)
+    except _Desordenado:
+        # CSV fuera de orden cronológico: no se puede acumular, se lee completo
+        partes = list(ingesta.iterar_bloques(fuente, columnas, tamano_bloque))
+        df = pd.concat(partes, ignore_index=True)
+        df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+        return estadisticas_ticker(df, tasa_rf)
+    return acumulador.resultado(tasa_rf)
+
+
+def actualizar_estadisticas(tickers, archivo=ARCHIVO_ESTADISTICAS, tasa_rf=TASA_RF_ANUAL,
+                            tamano_bloque=ingesta.BLOQUE_FILAS):
+    """
+    Genera o actualiza la tabla de estadísticas para {ticker: ruta_csv} (o
+    {ticker: Fuente}, p. ej. los miembros de un ZIP).
+    Solo se recalculan los tickers nuevos o cuyo archivo cambió desde la última
+    vez; los que ya no existen se eliminan. Los CSV se leen por bloques en un
+    pool de procesos y cada fila se escribe en cuanto está lista.
+    Devuelve (tabla, tickers_recalculados).
+    """
+    fuentes = ingesta.como_fuentes(tickers)
+    previa = leer_estadisticas(archivo).set_index("Ticker")
+    vigentes = [t for t, f in fuentes.items() if t in previa.index and previa.at[t, "Version"] == f.version]
+    pendientes = [f for t, f in fuentes.items() if t not in set(vigentes)]
+    if not pendientes and len(vigentes) == len(previa):
+        return previa.reset_index().reindex(columns=COLUMNAS), []
+
+    tmp = archivo + ".tmp"
+    recalculados = []
+    try:
+        with open(tmp, "w", newline="") as f:
+            previa.loc[vigentes].reset_index().reindex(columns=COLUMNAS).to_csv(f, index=False)
+            resultados = ingesta.procesar(pendientes, _estadisticas_fuente, tasa_rf, tamano_bloque,
+                                          procesos=ingesta.procesos_para(len(pendientes)))
+            for fuente, estadisticas, error in resultados:
+                if isinstance(error, (KeyError, ValueError, pd.errors.EmptyDataError)):
+                    estadisticas = {}  # CSV mal formado: fila vacía, no se reintenta hasta que cambie
+                elif error is not None:
+                    raise error
+                fila = {"Ticker": fuente.ticker, **estadisticas, "Version": fuente.version}
+                pd.DataFrame([fila], columns=COLUMNAS).to_csv(f, index=False, header=False)
+                recalculados.append(fuente.ticker)
+    except Exception:
+        os.remove(tmp)
+        raise
+    os.replace(tmp, archivo)
+    return leer_estadisticas(archivo), recalculados
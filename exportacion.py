@@ -0,0 +1,121 @@
+# exportacion.py
+import os
+import time
+import zipfile
+import tempfile
+import pandas as pd
+
+TAMANO_BLOQUE = 50_000  # filas por bloque al leer cada CSV
+EDAD_MAXIMA_S = 60 * 60  # exportaciones olvidadas en disco se borran después de una hora
+FORMATOS = {"ZIP (un CSV por empresa)": "zip", "CSV único": "csv", "Parquet único": "parquet"}
+EXTENSIONES = {"zip": ".zip", "csv": ".csv", "parquet": ".parquet"}
+MIMES = {"zip": "application/zip", "csv": "text/csv", "parquet": "application/octet-stream"}
+RENOMBRES = {"Adj_Close": "Adj Close"}  # algunos históricos usan otro nombre para la misma columna
+
+
+def columnas_exportacion(rutas):
+    """
+    Unión ordenada de las columnas de los CSV de 'rutas' (ya normalizadas),
+    leyendo solo el encabezado de cada archivo.
+    """
+    columnas = {}
+    for ruta in rutas.values():
+        for c in pd.read_csv(ruta, nrows=0).rename(columns=RENOMBRES).columns:
+            columnas.setdefault(c, None)
+    return list(columnas)
+
+
+def iterar_bloques(rutas, desde=None, hasta=None, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Recorre {ticker: ruta_csv} y produce (ticker, bloque) con las filas entre
+    'desde' y 'hasta'. Nunca hay más de 'tamano_bloque' filas en memoria.
+    """
+    for ticker, ruta in rutas.items():
+        for bloque in pd.read_csv(ruta, parse_dates=["Date"], chunksize=tamano_bloque):
+            bloque = bloque.rename(columns=RENOMBRES)
+            if desde is not None:
+                bloque = bloque[bloque["Date"] >= pd.Timestamp(desde)]
+            if hasta is not None:
+                bloque = bloque[bloque["Date"] <= pd.Timestamp(hasta)]
+            if not bloque.empty:
+                yield ticker, bloque
+
+
+def _escribir_zip(bloques, destino, columnas):
+    # Un archivo por ticker: cada uno conserva sus propias columnas
+    with zipfile.ZipFile(destino, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        actual, entrada = None, None
+        for ticker, bloque in bloques:
+            if ticker != actual:
+                if entrada is not None:
+                    entrada.close()
+                entrada = zf.open(f"{ticker}.csv", "w")
+                entrada.write(bloque.to_csv(index=False, date_format="%Y-%m-%d").encode())
+                actual = ticker
+            else:
+                entrada.write(bloque.to_csv(index=False, header=False, date_format="%Y-%m-%d").encode())
+        if entrada is not None:
+            entrada.close()
+
+
+def _escribir_csv(bloques, destino, columnas):
+    # Formato largo: una columna Ticker y la unión de las columnas de los
+    # históricos (vacía en los tickers que no la tienen)
+    columnas = ["Ticker"] + [c for c in columnas if c != "Ticker"]
+    with open(destino, "w", newline="") as f:
+        encabezado = True
+        for ticker, bloque in bloques:
+            bloque = bloque.assign(Ticker=ticker).reindex(columns=columnas)
+            bloque.to_csv(f, index=False, header=encabezado, date_format="%Y-%m-%d")
+            encabezado = False
+
+
+def _escribir_parquet(bloques, destino, columnas):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    columnas = ["Ticker"] + [c for c in columnas if c != "Ticker"]
+    escritor = None
+    try:
+        for ticker, bloque in bloques:
+            bloque = bloque.assign(Ticker=ticker).reindex(columns=columnas)
+            tabla = pa.Table.from_pandas(bloque, preserve_index=False)
+            if escritor is None:
+                escritor = pq.ParquetWriter(destino, tabla.schema)
+            escritor.write_table(tabla.cast(escritor.schema))
+    finally:
+        if escritor is not None:
+            escritor.close()
+
+
+ESCRITORES = {"zip": _escribir_zip, "csv": _escribir_csv, "parquet": _escribir_parquet}
+
+
+def limpiar_exportaciones(carpeta, edad_maxima_s=EDAD_MAXIMA_S):
+    """Borra de 'carpeta' las exportaciones con más de 'edad_maxima_s' segundos."""
+    if not os.path.isdir(carpeta):
+        return
+    limite = time.time() - edad_maxima_s
+    for f in os.listdir(carpeta):
+        ruta = os.path.join(carpeta, f)
+        if f.startswith("exportacion_") and os.path.getmtime(ruta) < limite:
+            try:
+                os.remove(ruta)
+            except OSError:
+                pass  # otra sesión lo está borrando o sirviendo
+
+
+def exportar(rutas, formato="zip", desde=None, hasta=None, carpeta=None, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Escribe en disco la exportación de los tickers de 'rutas' entre 'desde' y
+    'hasta', bloque a bloque, y devuelve la ruta del archivo generado.
+    """
+    fd, destino = tempfile.mkstemp(suffix=EXTENSIONES[formato], prefix="exportacion_", dir=carpeta)
+    os.close(fd)
+    try:
+        ESCRITORES[formato](iterar_bloques(rutas, desde, hasta, tamano_bloque), destino,
+                            columnas_exportacion(rutas))
+    except Exception:
+        os.remove(destino)
+        raise
+    return destino
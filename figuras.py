@@ -0,0 +1,112 @@
+# figuras.py
+import os
+import json
+import threading
+from collections import OrderedDict
+import plotly.io as pio
+import plotly.graph_objects as go
+import streamlit as st
+
+UMBRAL_WEBGL = 5_000  # puntos por traza a partir de los cuales se usa WebGL
+MAX_FIGURAS = 256     # figuras serializadas que se guardan por proceso
+MAX_BYTES_FIGURAS = int(os.environ.get("FIGURAS_MAX_MB", 64)) * 1024 * 1024  # tamaño total de esos JSON
+
+
+def usar_webgl(fig, umbral=UMBRAL_WEBGL):
+    """
+    Cambia a Scattergl las trazas Scatter con más de 'umbral' puntos.
+    Plotly no dibuja trazas WebGL dentro del range slider, así que en ese caso
+    se oculta el slider (el zoom y los botones de rango siguen disponibles).
+    """
+    if not any(t.type == "scatter" and t.x is not None and len(t.x) > umbral for t in fig.data):
+        return fig
+    trazas = []
+    for t in fig.data:
+        datos = t.to_plotly_json()
+        datos.pop("type", None)
+        if t.type == "scatter" and t.x is not None and len(t.x) > umbral:
+            trazas.append(go.Scattergl(datos))
+        else:
+            trazas.append(type(t)(datos))
+    fig.data = []
+    fig.add_traces(trazas)
+    if fig.layout.xaxis.rangeslider.visible:
+        fig.update_xaxes(rangeslider_visible=False)
+    return fig
+
+
+# Caché LRU por proceso, compartida entre sesiones
+_figuras = OrderedDict()
+_bytes_figuras = 0
+_candado = threading.Lock()
+
+
+def spec_figura(clave, construir):
+    """
+    Devuelve el JSON de la figura identificada por 'clave'
+    (tipo de gráfico, ticker, frecuencia, versión de datos).
+    Solo llama a 'construir()' si la figura no está en caché. La caché se
+    limita por número de figuras y por el tamaño total de sus JSON.
+    """
+    global _bytes_figuras
+    with _candado:
+        spec = _figuras.get(clave)
+        if spec is not None:
+            _figuras.move_to_end(clave)
+            return spec
+
+    fig = usar_webgl(construir())
+    spec = pio.to_json(fig, validate=False)
+    if len(spec) > MAX_BYTES_FIGURAS:
+        return spec  # no cabe: se sirve sin guardarla
+    with _candado:
+        if clave not in _figuras:
+            _figuras[clave] = spec
+            _bytes_figuras += len(spec)
+        while len(_figuras) > MAX_FIGURAS or _bytes_figuras > MAX_BYTES_FIGURAS:
+            _, viejo = _figuras.popitem(last=False)
+            _bytes_figuras -= len(viejo)
+    return spec
+
+
+def mostrar_figura(spec, use_container_width=True):
+    """
+    Envía al navegador una figura ya serializada sin reconstruirla ni volver a
+    convertirla a JSON. Usa la API interna de Streamlit; si esta cambia (falta
+    un módulo, cambia una firma o un campo del proto) vuelve a st.plotly_chart.
+    """
+    try:
+        _enviar_spec(spec, use_container_width)
+    except Exception:
+        st.plotly_chart(pio.from_json(spec), use_container_width=use_container_width)
+
+
+def _enviar_spec(spec, use_container_width):
+    from streamlit.proto.PlotlyChart_pb2 import PlotlyChart as PlotlyChartProto
+    from streamlit.elements.form import current_form_id
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    from streamlit.runtime.state.common import compute_widget_id
+
+    dg = st._main
+    proto = PlotlyChartProto()
+    proto.use_container_width = use_container_width
+    proto.theme = "streamlit"
+    proto.form_id = current_form_id(dg)
+    proto.spec = spec
+    proto.config = json.dumps({"showLink": False, "linkText": False})
+
+    ctx = get_script_run_ctx()
+    proto.id = compute_widget_id(
+        "plotly_chart",
+        user_key=None,
+        key=None,
+        plotly_spec=proto.spec,
+        plotly_config=proto.config,
+        selection_mode=None,
+        is_selection_activated=False,
+        theme="streamlit",
+        form_id=proto.form_id,
+        use_container_width=use_container_width,
+        page=ctx.active_script_hash if ctx else None,
+    )
+    dg._enqueue("plotly_chart", proto)
@@ -0,0 +1,118 @@
+# ingesta.py
+import os
+import zipfile
+import argparse
+import multiprocessing
+from collections import namedtuple
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import pandas as pd
+
+from datos_acciones import tickers_en_carpeta, version_archivo
+
+# Filas por bloque al leer un CSV y procesos del pool (configurables por entorno)
+BLOQUE_FILAS = int(os.environ.get("INGESTA_BLOQUE_FILAS", 50_000))
+PROCESOS = int(os.environ.get("INGESTA_PROCESOS", min(4, os.cpu_count() or 1)))
+
+# Los procesos no se crean con fork: el servidor de Streamlit tiene hilos (y
+# candados tomados por la precarga) que no deben copiarse a los hijos.
+CONTEXTO = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+# Un CSV por ticker, en disco (miembro=None) o dentro de un ZIP
+Fuente = namedtuple("Fuente", ["ticker", "ruta", "miembro", "version"])
+
+
+# ================================
+# FUENTES
+# ================================
+def fuentes_carpeta(rutas):
+    """{ticker: ruta_csv} -> {ticker: Fuente} de archivos en disco."""
+    return {t: Fuente(t, r, None, version_archivo(r)) for t, r in rutas.items()}
+
+
+def fuentes_zip(ruta_zip):
+    """{ticker: Fuente} con cada CSV del ZIP, sin descomprimirlo (mismo nombre de ticker que en disco)."""
+    fuentes = {}
+    with zipfile.ZipFile(ruta_zip) as zf:
+        for info in sorted(zf.infolist(), key=lambda i: i.filename):
+            if info.is_dir() or not info.filename.endswith(".csv"):
+                continue
+            ticker = os.path.splitext(os.path.basename(info.filename))[0].split("_")[0]
+            if ticker not in fuentes:
+                fuentes[ticker] = Fuente(ticker, ruta_zip, info.filename, f"zip-{info.CRC}-{info.file_size}")
+    return fuentes
+
+
+def como_fuentes(tickers):
+    """Acepta {ticker: ruta_csv} o {ticker: Fuente}."""
+    if all(isinstance(f, (str, os.PathLike)) for f in tickers.values()):
+        return fuentes_carpeta(tickers)
+    return dict(tickers)
+
+
+def iterar_bloques(fuente, columnas=None, tamano_bloque=BLOQUE_FILAS):
+    """Produce los bloques de 'tamano_bloque' filas del CSV de 'fuente' (solo 'columnas')."""
+    usecols = (lambda c: c in columnas) if columnas else None
+    if fuente.miembro is None:
+        with open(fuente.ruta, "rb") as f:
+            yield from pd.read_csv(f, usecols=usecols, chunksize=tamano_bloque)
+    else:
+        with zipfile.ZipFile(fuente.ruta) as zf, zf.open(fuente.miembro) as f:
+            yield from pd.read_csv(f, usecols=usecols, chunksize=tamano_bloque)
+
+
+# ================================
+# PROCESAMIENTO EN PARALELO
+# ================================
+def procesar(fuentes, tarea, *args, procesos=PROCESOS, ventana=None):
+    """
+    Ejecuta tarea(fuente, *args) para cada fuente en un pool de procesos y
+    produce (fuente, resultado, error) a medida que terminan. Nunca hay más
+    de 'ventana' tareas en vuelo (por defecto 2 por proceso), así que la
+    memoria no crece con el número de archivos.
+    """
+    fuentes = iter(fuentes)
+    if procesos <= 1:
+        for fuente in fuentes:
+            try:
+                yield fuente, tarea(fuente, *args), None
+            except Exception as e:
+                yield fuente, None, e
+        return
+
+    ventana = ventana or 2 * procesos
+    with ProcessPoolExecutor(max_workers=procesos, mp_context=CONTEXTO) as pool:
+        pendientes = {pool.submit(tarea, f, *args): f for f in islice(fuentes, ventana)}
+        while pendientes:
+            hechas, _ = wait(pendientes, return_when=FIRST_COMPLETED)
+            for futuro in hechas:
+                fuente = pendientes.pop(futuro)
+                try:
+                    yield fuente, futuro.result(), None
+                except Exception as e:
+                    yield fuente, None, e
+                for nueva in islice(fuentes, 1):
+                    pendientes[pool.submit(tarea, nueva, *args)] = nueva
+
+
+def procesos_para(n_tareas):
+    """No vale la pena levantar un pool para uno o dos archivos."""
+    return 1 if n_tareas <= 2 else min(PROCESOS, n_tareas)
+
+
+if __name__ == "__main__":
+    import estadisticas_tickers as et
+
+    parser = argparse.ArgumentParser(description="Genera la tabla de estadísticas leyendo los CSV por bloques.")
+    parser.add_argument("origen", help="Carpeta con los CSV por ticker o ZIP con ellos")
+    parser.add_argument("--archivo", default=et.ARCHIVO_ESTADISTICAS, help="CSV de salida")
+    args = parser.parse_args()
+
+    if zipfile.is_zipfile(args.origen):
+        fuentes = fuentes_zip(args.origen)
+    else:
+        fuentes = fuentes_carpeta(tickers_en_carpeta(args.origen))
+    tabla, recalculados = et.actualizar_estadisticas(fuentes, args.archivo)
+    print(f"{len(tabla)} tickers en {args.archivo}, {len(recalculados)} recalculados.")
@@ -0,0 +1,190 @@
+# memoria_sesion.py
+import os
+import sys
+import time
+import pickle
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+MB = 1024 * 1024
+PRESUPUESTO_SESION = int(os.environ.get("MEMORIA_SESION_MB", 200)) * MB
+PRESUPUESTO_GLOBAL = int(os.environ.get("MEMORIA_GLOBAL_MB", 1500)) * MB
+INACTIVIDAD_DISCO_S = 15 * 60       # sesión inactiva: sus objetos pasan a disco
+INACTIVIDAD_BORRAR_S = 4 * 60 * 60  # sesión abandonada: se borra del todo
+CARPETA_DISCO = os.path.join(tempfile.gettempdir(), "brainvest_sesiones")
+
+
+def tamano_aprox(obj):
+    """Tamaño aproximado en bytes de un objeto pesado."""
+    if isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+        uso = obj.memory_usage(deep=True)
+        return int(uso.sum()) if hasattr(uso, "sum") else int(uso)
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, (bytes, bytearray, str)):
+        return len(obj)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(tamano_aprox(k) + tamano_aprox(v) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sys.getsizeof(obj) + sum(tamano_aprox(v) for v in obj)
+    return sys.getsizeof(obj)
+
+
+class _Entrada:
+    __slots__ = ("valor", "tamano", "ruta")
+
+    def __init__(self, valor, tamano):
+        self.valor = valor
+        self.tamano = tamano
+        self.ruta = None  # archivo en disco si fue desalojada
+
+    @property
+    def en_memoria(self):
+        return self.ruta is None
+
+
+# {id_sesion: OrderedDict(clave -> _Entrada)}, del menos al más reciente
+_sesiones = {}
+_actividad = {}
+_candado = threading.RLock()
+
+
+def id_sesion():
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else "local"
+
+
+# ================================
+# API
+# ================================
+def guardar(clave, valor):
+    """Guarda un objeto pesado de la sesión actual y aplica los presupuestos."""
+    sid = id_sesion()
+    with _candado:
+        entradas = _sesiones.setdefault(sid, OrderedDict())
+        _descartar(entradas.pop(clave, None))
+        entradas[clave] = _Entrada(valor, tamano_aprox(valor))
+        _actividad[sid] = time.time()
+        _aplicar_presupuestos(sid, protegida=clave)
+    return valor
+
+
+def obtener(clave, defecto=None):
+    """Devuelve el objeto (trayéndolo de disco si hace falta) o 'defecto'."""
+    sid = id_sesion()
+    with _candado:
+        entradas = _sesiones.get(sid)
+        if not entradas or clave not in entradas:
+            return defecto
+        entrada = entradas[clave]
+        entradas.move_to_end(clave)
+        _actividad[sid] = time.time()
+        if not entrada.en_memoria:
+            with open(entrada.ruta, "rb") as f:
+                entrada.valor = pickle.load(f)
+            os.remove(entrada.ruta)
+            entrada.ruta = None
+            _aplicar_presupuestos(sid, protegida=clave)
+        return entrada.valor
+
+
+def liberar(clave):
+    sid = id_sesion()
+    with _candado:
+        entradas = _sesiones.get(sid)
+        if entradas:
+            _descartar(entradas.pop(clave, None))
+
+
+def tocar():
+    """Marca actividad de la sesión actual y ordena la memoria de las inactivas."""
+    with _candado:
+        _actividad[id_sesion()] = time.time()
+        limpiar_inactivas()
+
+
+# ================================
+# PRESUPUESTOS Y DESALOJO
+# ================================
+def _descartar(entrada):
+    if entrada is not None and entrada.ruta and os.path.exists(entrada.ruta):
+        os.remove(entrada.ruta)
+
+
+def _a_disco(sid, clave, entrada):
+    os.makedirs(CARPETA_DISCO, exist_ok=True)
+    ruta = os.path.join(CARPETA_DISCO, f"{sid}_{abs(hash(clave))}.pkl")
+    with open(ruta, "wb") as f:
+        pickle.dump(entrada.valor, f, protocol=pickle.HIGHEST_PROTOCOL)
+    entrada.valor = None
+    entrada.ruta = ruta
+
+
+def _memoria(entradas):
+    return sum(e.tamano for e in entradas.values() if e.en_memoria)
+
+
+def _aplicar_presupuestos(sid, protegida=None):
+    # Presupuesto por sesión: se bajan a disco sus objetos menos usados
+    entradas = _sesiones[sid]
+    for clave in list(entradas):
+        if _memoria(entradas) <= PRESUPUESTO_SESION:
+            break
+        if clave != protegida and entradas[clave].en_memoria:
+            _a_disco(sid, clave, entradas[clave])
+
+    # Presupuesto global: primero las sesiones que llevan más tiempo sin actividad
+    total = sum(_memoria(e) for e in _sesiones.values())
+    for otra in sorted(_sesiones, key=lambda s: _actividad.get(s, 0)):
+        for clave, entrada in _sesiones[otra].items():
+            if total <= PRESUPUESTO_GLOBAL:
+                return
+            if (otra, clave) != (sid, protegida) and entrada.en_memoria:
+                total -= entrada.tamano
+                _a_disco(otra, clave, entrada)
+
+
+def limpiar_inactivas():
+    """Baja a disco las sesiones inactivas y elimina las abandonadas."""
+    ahora = time.time()
+    with _candado:
+        for sid in list(_sesiones):
+            inactiva = ahora - _actividad.get(sid, 0)
+            if inactiva > INACTIVIDAD_BORRAR_S:
+                for entrada in _sesiones.pop(sid).values():
+                    _descartar(entrada)
+                _actividad.pop(sid, None)
+            elif inactiva > INACTIVIDAD_DISCO_S:
+                for clave, entrada in _sesiones[sid].items():
+                    if entrada.en_memoria:
+                        _a_disco(sid, clave, entrada)
+
+
+def resumen():
+    """Tabla por sesión con objetos, memoria y disco usados (para administración)."""
+    ahora = time.time()
+    with _candado:
+        filas = [{
+            "Sesion": sid[:8],
+            "Objetos": len(entradas),
+            "Memoria MB": round(_memoria(entradas) / MB, 2),
+            "Disco MB": round(sum(e.tamano for e in entradas.values() if not e.en_memoria) / MB, 2),
+            "Inactiva (min)": round((ahora - _actividad.get(sid, ahora)) / 60, 1),
+            "Claves": ", ".join(entradas),
+        } for sid, entradas in _sesiones.items()]
+    return pd.DataFrame(filas, columns=["Sesion", "Objetos", "Memoria MB", "Disco MB", "Inactiva (min)", "Claves"])
+
+
+def vaciar_disco():
+    """Borra la carpeta de objetos desalojados (al reiniciar el servidor)."""
+    shutil.rmtree(CARPETA_DISCO, ignore_errors=True)
+
+
+# Los objetos en disco de un proceso anterior ya no pertenecen a ninguna sesión
+vaciar_disco()
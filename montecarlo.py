@@ -0,0 +1,52 @@
+# montecarlo.py
+import numpy as np
+
+DIAS_HABILES = 252
+N_PORTAFOLIOS = 200_000
+TAMANO_LOTE = 20_000   # pesos en memoria a la vez: lote x tickers
+BINS = (120, 120)      # resolución fija de la imagen que llega al navegador
+
+
+def momentos(precios, cobertura=None):
+    """
+    Retorno medio diario y covarianza diaria de un DataFrame fechas x tickers.
+    Con 'cobertura' (True donde hubo cotización real) se descartan los días
+    rellenados, que si no entrarían como retornos de 0%; cada ticker usa sus
+    propios días y la covarianza se calcula por pares.
+    """
+    retornos = precios.pct_change(fill_method=None)
+    if cobertura is None:
+        retornos = retornos.dropna()
+    else:
+        retornos = retornos.where(cobertura)
+    return retornos.mean().to_numpy(), retornos.cov().to_numpy()
+
+
+def retorno_riesgo(pesos, mu, cov):
+    """
+    Retorno y riesgo anuales (en %) de una matriz de pesos portafolios x tickers,
+    con las mismas escalas que la frontera (x252 y x raíz de 252).
+    """
+    retorno = pesos @ mu * DIAS_HABILES * 100
+    varianza = np.einsum("ij,jk,ik->i", pesos, cov, pesos)
+    riesgo = np.sqrt(np.maximum(varianza, 0)) * np.sqrt(DIAS_HABILES) * 100
+    return retorno, riesgo
+
+
+def nube_aleatoria(mu, cov, n=N_PORTAFOLIOS, tamano_lote=TAMANO_LOTE, bins=BINS, semilla=0):
+    """
+    Genera 'n' portafolios aleatorios (pesos Dirichlet, solo posiciones largas)
+    por lotes y los agrupa en una rejilla 2D riesgo x retorno.
+    Devuelve (conteos, centros_riesgo, centros_retorno); conteos es retorno x riesgo.
+    """
+    rng = np.random.default_rng(semilla)
+    retornos = np.empty(n)
+    riesgos = np.empty(n)
+    for inicio in range(0, n, tamano_lote):
+        fin = min(inicio + tamano_lote, n)
+        pesos = rng.dirichlet(np.ones(len(mu)), size=fin - inicio)
+        retornos[inicio:fin], riesgos[inicio:fin] = retorno_riesgo(pesos, mu, cov)
+
+    conteos, bordes_riesgo, bordes_retorno = np.histogram2d(riesgos, retornos, bins=bins)
+    centros = lambda b: (b[:-1] + b[1:]) / 2
+    return conteos.T, centros(bordes_riesgo), centros(bordes_retorno)
@@ -3,69 +3,109 @@ import os
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-import zipfile
 import datetime
-import gdown
+import estadisticas_tickers as et
+import datos_acciones as da
+import actualizacion_datos as ad
+import cargas
+import precarga
+import figuras
+import exportacion
+from utilidades import CLAVE_ADMIN
 
 # ================================
 # CONFIGURACIÓN DE DATOS
 # ================================
-ZIP_FILE_ID = "1UrY3VOcpirbthISl0bnve6E8OP_-3vym"  # ID de tu nuevo zip en Drive
-CARPETA_DATOS = "acciones_procesadas"
-ZIP_NAME = "acciones_procesadas.zip"
+ZIP_FILE_ID = cargas.HISTORICOS_ZIP_ID  # ID de tu nuevo zip en Drive
+CARPETA_DATOS = cargas.HISTORICOS_CARPETA
+ZIP_NAME = cargas.HISTORICOS_ZIP
 
-def download_and_unzip():
-    url = f"https://drive.google.com/uc?export=download&id={ZIP_FILE_ID}"
-    st.info("Descargando base de datos desde Google Drive, por favor espera...")
-    gdown.download(url, ZIP_NAME, quiet=False)
-    with zipfile.ZipFile(ZIP_NAME, "r") as zf:
-        zf.extractall(CARPETA_DATOS)
-
-if not os.path.exists(CARPETA_DATOS) or len(os.listdir(CARPETA_DATOS)) == 0:
-    download_and_unzip()
+# La descarga la hace la precarga en segundo plano; mientras tanto se avisa
+# en vez de bloquear la página.
+if not cargas.historicos_listos():
+    precarga.sin_bloquear("historicos", "Descargando base de datos desde Google Drive, por favor espera...")
 
 # ================================
 # CARGA DE ARCHIVOS
 # ================================
-archivos = []
-for root, _, files in os.walk(CARPETA_DATOS):
-    for f in files:
-        if f.endswith(".csv"):
-            archivos.append(os.path.join(root, f))
-
-archivos = sorted(archivos)
+# Diccionario {ticker: ruta}
+tickers = cargas.asegurar_historicos()
 
-if not archivos:
+if not tickers:
     st.error("No se encontraron archivos CSV en la carpeta.") 
     st.stop()
 
-# Diccionario {ticker: ruta}
-tickers = {}
-for f in archivos:
-    nombre = os.path.splitext(os.path.basename(f))[0]
-    nombre = nombre.split("_")[0]
-    if nombre not in tickers:  # evita duplicados
-        tickers[nombre] = f
+# ================================
+# ACTUALIZACIÓN INCREMENTAL
+# ================================
+# Modifica los históricos de todos los usuarios: solo para el administrador.
+with st.sidebar.expander(" Actualizar datos (administrador)"):
+    clave = st.text_input("Contraseña de administrador", type="password", key="clave_actualizacion")
+    fuente_sel = st.radio("Fuente", ["Yahoo Finance", "Carpeta local"], key="fuente_actualizacion")
+    carpeta_origen = None
+    if fuente_sel == "Carpeta local":
+        carpeta_origen = st.text_input("Carpeta con CSV nuevos", value="nuevos_csv")
+    if st.button("Traer barras nuevas", disabled=clave != CLAVE_ADMIN):
+        fuente = ad.FuenteCarpetaCSV(carpeta_origen) if carpeta_origen else ad.FuenteYFinance()
+        with st.spinner("Actualizando históricos..."):
+            cambios, errores = ad.actualizar_carpeta(
+                CARPETA_DATOS, fuente,
+                on_cambio=lambda cambiados: cargas.asegurar_estadisticas(tickers)
+            )
+        st.success(f"{len(cambios)} tickers actualizados ({sum(cambios.values())} barras nuevas).")
+        if errores:
+            st.warning(f"No se pudieron actualizar: {', '.join(errores)}")
 
 # ================================
 # BOTÓN DESCARGA MASIVA
 # ================================
 st.sidebar.subheader(" Descargar datos")
 
-# usamos directamente el archivo original descargado de Drive
-with open(ZIP_NAME, "rb") as f:
-    st.sidebar.download_button(
-        label="Descargar todos los históricos (ZIP)",
-        data=f,
-        file_name="historicos_acciones.zip",
-        mime="application/zip"
+# El archivo completo se descarga directo desde Drive: el servidor no lo
+# carga en memoria en cada recarga de la página.
+st.sidebar.link_button(
+    "Descargar todos los históricos (ZIP)",
+    f"https://drive.google.com/uc?export=download&id={ZIP_FILE_ID}"
+)
+
+# Exportación a medida: se arma en disco, por bloques, solo al pedirla.
+with st.sidebar.expander(" Exportar empresas seleccionadas"):
+    seleccion = st.multiselect("Empresas", sorted(tickers.keys()), key="export_tickers")
+    rango = st.date_input(
+        "Rango de fechas",
+        value=(datetime.date(2000, 1, 1), datetime.date.today()),
+        key="export_rango"
     )
+    formato = st.selectbox("Formato", list(exportacion.FORMATOS), key="export_formato")
+
+    # El botón de descarga solo existe en la ejecución que generó el archivo:
+    # en las recargas siguientes Streamlit ya no guarda sus bytes en memoria.
+    if st.button("Generar archivo", disabled=not seleccion):
+        desde, hasta = (rango[0], rango[-1]) if isinstance(rango, (tuple, list)) and rango else (None, None)
+        clave = exportacion.FORMATOS[formato]
+        os.makedirs("exportaciones", exist_ok=True)
+        exportacion.limpiar_exportaciones("exportaciones")
+        with st.spinner("Generando archivo..."):
+            ruta_export = exportacion.exportar(
+                {t: tickers[t] for t in seleccion}, clave, desde, hasta, carpeta="exportaciones"
+            )
+        try:
+            with open(ruta_export, "rb") as f:
+                contenido = f.read()
+        finally:
+            os.remove(ruta_export)
+        st.download_button(
+            label=f"Descargar ({len(contenido) / 1e6:.1f} MB)",
+            data=contenido,
+            file_name=f"historicos_seleccion{exportacion.EXTENSIONES[clave]}",
+            mime=exportacion.MIMES[clave]
+        )
 
 # ================================
 # NAVEGACIÓN
 # ================================
 st.sidebar.title(" Navegación")
-pagina = st.sidebar.radio("Selecciona una página:", ["Análisis Histórico"])
+pagina = st.sidebar.radio("Selecciona una página:", ["Análisis Histórico", "Screener de Acciones"])
 
 # ================================
 # PÁGINA DE ANÁLISIS HISTÓRICO
@@ -74,10 +114,12 @@ if pagina == "Análisis Histórico":
     st.title(" Visualización de Históricos de Empresas")
 
     ticker = st.selectbox("Seleccione una empresa:", sorted(tickers.keys()))
+    if st.session_state.get("ticker") != ticker:
+        precarga.registrar_uso(ticker)
     st.session_state["ticker"] = ticker
 
     ruta = tickers[ticker]
-    df = pd.read_csv(ruta)
+    df = cargas.leer_ticker(ruta, da.version_archivo(ruta))
 
     # Formateo de fechas
     df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
@@ -121,56 +163,135 @@ if pagina == "Análisis Histórico":
             color=texto
         )
 
+    # Las figuras se guardan serializadas por (gráfico, ticker, frecuencia, versión):
+    # al volver a un ticker ya visto o cambiar otro widget no se reconstruyen.
+    version = da.version_archivo(ruta)
+
     # ================================
     # GRÁFICO DE PRECIOS
     # ================================
     st.subheader(" Evolución del Precio Ajustado (Adj Close)")
-    fig_price = px.line(df, x="Date", y="Adj Close",
-                        title=f"Evolución histórica de {ticker}",
-                        labels={"Date": "Fecha", "Adj Close": "Precio Ajustado"},
-                        template="plotly_dark")
-    fig_price.update_traces(line=dict(width=3, color=verde))
-    fig_price.update_xaxes(**rango_xaxis())
-    st.plotly_chart(fig_price, use_container_width=True)
+
+    def construir_precio():
+        fig_price = px.line(df, x="Date", y="Adj Close",
+                            title=f"Evolución histórica de {ticker}",
+                            labels={"Date": "Fecha", "Adj Close": "Precio Ajustado"},
+                            template="plotly_dark")
+        fig_price.update_traces(line=dict(width=3, color=verde))
+        fig_price.update_xaxes(**rango_xaxis())
+        return fig_price
+
+    figuras.mostrar_figura(figuras.spec_figura(("precio", ticker, "Diario", version), construir_precio))
 
     # ================================
     # GRÁFICO DE VOLUMEN
     # ================================
     st.subheader(" Volumen de Transacciones")
     opcion_vol = st.selectbox("Frecuencia del volumen", ["Diario", "Semanal", "Mensual"])
-    df_vol = df.copy()
-    if opcion_vol == "Semanal":
-        df_vol = df.resample("W", on="Date")["Volume"].sum().reset_index()
-    elif opcion_vol == "Mensual":
-        df_vol = df.resample("M", on="Date")["Volume"].sum().reset_index()
-    fig_vol = px.line(df_vol, x="Date", y="Volume",
-                      title=f"Volumen de transacciones ({opcion_vol}) - {ticker}",
-                      labels={"Date": "Fecha", "Volume": "Acciones Negociadas"},
-                      template="plotly_dark")
-    fig_vol.update_traces(line=dict(width=2.5, color=naranja))
-    fig_vol.update_xaxes(**rango_xaxis())
-    st.plotly_chart(fig_vol, use_container_width=True)
+
+    def construir_volumen():
+        df_vol = df.copy()
+        if opcion_vol == "Semanal":
+            df_vol = df.resample("W", on="Date")["Volume"].sum().reset_index()
+        elif opcion_vol == "Mensual":
+            df_vol = df.resample("M", on="Date")["Volume"].sum().reset_index()
+        fig_vol = px.line(df_vol, x="Date", y="Volume",
+                          title=f"Volumen de transacciones ({opcion_vol}) - {ticker}",
+                          labels={"Date": "Fecha", "Volume": "Acciones Negociadas"},
+                          template="plotly_dark")
+        fig_vol.update_traces(line=dict(width=2.5, color=naranja))
+        fig_vol.update_xaxes(**rango_xaxis())
+        return fig_vol
+
+    figuras.mostrar_figura(figuras.spec_figura(("volumen", ticker, opcion_vol, version), construir_volumen))
 
     # ================================
     # GRÁFICO DE RETORNOS
     # ================================
     st.subheader(" Retornos de la Acción")
     opcion_ret = st.selectbox("Frecuencia de retornos", ["Diario", "Semanal", "Mensual"])
-    df_ret = df.copy()
-    if opcion_ret == "Semanal":
-        df_ret = df.resample("W", on="Date").agg(
-            {"Return": "mean", "Cumulative Return": "last"}).reset_index()
-    elif opcion_ret == "Mensual":
-        df_ret = df.resample("M", on="Date").agg(
-            {"Return": "mean", "Cumulative Return": "last"}).reset_index()
-
-    fig_ret = go.Figure()
-    fig_ret.add_trace(go.Scatter(x=df_ret["Date"], y=df_ret["Return"],
-                                 mode="lines", name="Retorno (%)",
-                                 line=dict(color=verde, width=2), opacity=0.8))
-    fig_ret.add_trace(go.Scatter(x=df_ret["Date"], y=df_ret["Cumulative Return"] * 100,
-                                 mode="lines", name="Retorno Acumulado (%)",
-                                 line=dict(color=azul, width=3)))
-    fig_ret.update_xaxes(**rango_xaxis())
-    st.plotly_chart(fig_ret, use_container_width=True)
 
+    def construir_retornos():
+        df_ret = df.copy()
+        if opcion_ret == "Semanal":
+            df_ret = df.resample("W", on="Date").agg(
+                {"Return": "mean", "Cumulative Return": "last"}).reset_index()
+        elif opcion_ret == "Mensual":
+            df_ret = df.resample("M", on="Date").agg(
+                {"Return": "mean", "Cumulative Return": "last"}).reset_index()
+
+        fig_ret = go.Figure()
+        fig_ret.add_trace(go.Scatter(x=df_ret["Date"], y=df_ret["Return"],
+                                     mode="lines", name="Retorno (%)",
+                                     line=dict(color=verde, width=2), opacity=0.8))
+        fig_ret.add_trace(go.Scatter(x=df_ret["Date"], y=df_ret["Cumulative Return"] * 100,
+                                     mode="lines", name="Retorno Acumulado (%)",
+                                     line=dict(color=azul, width=3)))
+        fig_ret.update_xaxes(**rango_xaxis())
+        return fig_ret
+
+    figuras.mostrar_figura(figuras.spec_figura(("retornos", ticker, opcion_ret, version), construir_retornos))
+
+# ================================
+# SCREENER DE ACCIONES
+# ================================
+elif pagina == "Screener de Acciones":
+    st.title(" Screener de Acciones")
+    st.caption(f"Sharpe calculado con una tasa libre de riesgo de {et.TASA_RF_ANUAL*100:.2f}% anual.")
+
+    # Estadísticas precalculadas: solo se recalculan los tickers nuevos o
+    # modificados. Si la precarga las está generando no se espera.
+    if not os.path.exists(et.ARCHIVO_ESTADISTICAS):
+        precarga.sin_bloquear("estadisticas", "Calculando estadísticas por empresa...")
+    if not cargas.asegurar_estadisticas(tickers, esperar=False):
+        st.info("Las estadísticas se están actualizando en segundo plano; se muestra la última tabla disponible.")
+
+    if not os.path.exists(et.ARCHIVO_ESTADISTICAS):
+        st.warning("Aún no hay estadísticas calculadas.")
+        st.stop()
+    tabla = cargas.cargar_estadisticas(da.version_archivo(et.ARCHIVO_ESTADISTICAS))
+    if tabla.empty:
+        st.warning("Aún no hay estadísticas calculadas.")
+        st.stop()
+
+    col1, col2, col3 = st.columns(3)
+    sharpe_min = col1.number_input("Sharpe mínimo", value=float(tabla["Sharpe"].min()), step=0.1)
+    vol_max = col2.number_input("Volatilidad máxima (%)", value=float(tabla["Volatilidad"].max() * 100), step=1.0)
+    dd_max = col3.number_input("Máximo drawdown tolerado (%)", value=float(-tabla["MaxDrawdown"].min() * 100), step=1.0)
+
+    col4, col5, col6 = st.columns(3)
+    volumen_min = col4.number_input("Volumen promedio mínimo", value=0.0, step=100_000.0)
+    dias_min = col5.number_input("Días de historia mínimos", value=0, step=20)
+    top_n = col6.number_input("Mostrar primeras", min_value=1, value=min(50, len(tabla)), step=10)
+
+    columnas_orden = ["Sharpe", "RentabilidadAnualizada", "Volatilidad", "MaxDrawdown", "VolumenPromedio", "Dias"]
+    col7, col8 = st.columns(2)
+    orden = col7.selectbox("Ordenar por", columnas_orden)
+    ascendente = col8.radio("Dirección", ["Descendente", "Ascendente"], horizontal=True) == "Ascendente"
+
+    filtro = (
+        (tabla["Sharpe"] >= sharpe_min)
+        & (tabla["Volatilidad"] * 100 <= vol_max)
+        & (-tabla["MaxDrawdown"] * 100 <= dd_max)
+        & (tabla["VolumenPromedio"] >= volumen_min)
+        & (tabla["Dias"] >= dias_min)
+    )
+    resultado = tabla.loc[filtro].drop(columns="Version")
+    resultado = resultado.sort_values(orden, ascending=ascendente).head(int(top_n))
+
+    st.write(f"{filtro.sum()} de {len(tabla)} empresas cumplen los filtros.")
+    st.dataframe(
+        resultado.style.format({
+            "RentabilidadAnualizada": "{:.2%}", "Volatilidad": "{:.2%}", "MaxDrawdown": "{:.2%}",
+            "Sharpe": "{:.2f}", "VolumenPromedio": "{:,.0f}",
+            "FechaInicio": "{:%Y-%m-%d}", "FechaFin": "{:%Y-%m-%d}"
+        }),
+        use_container_width=True, hide_index=True
+    )
+
+    st.download_button(
+        " 📥 Descargar screener CSV",
+        resultado.to_csv(index=False),
+        file_name="screener_acciones.csv",
+        mime="text/csv"
+    )
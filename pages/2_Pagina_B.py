@@ -1,27 +1,35 @@
+import os
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-import io, zipfile, requests
+import cargas
+import precarga
+import figuras
+import montecarlo as mc
+import panel_precios as pp
 
 # ================================
 # CONFIGURACIÓN DE LA PÁGINA
 # ================================
 st.title(" Análisis de Portafolios")
 
-# --- ID de la hoja de Google Sheets ---
-SHEET_ID = "19xIH0ipdUYg0XELl4mHBLcNbmQ5vxQcL"
-url_excel = f"https://docs.google.com/spreadsheets/d/{SHEET_ID}/export?format=xlsx"
-
-# --- Leer todas las hojas desde Google Sheets ---
-st.info("Cargando base de datos desde Google Drive, por favor espera...")
-df_dict = pd.read_excel(url_excel, sheet_name=None, engine="openpyxl")
+# --- Leer todas las hojas desde Google Sheets (precargadas en segundo plano) ---
+precarga.sin_bloquear("libro", "Cargando base de datos desde Google Drive, por favor espera...")
+df_dict = cargas.cargar_libro_portafolios()
 
 # --- Extraer hojas ---
 df_res = df_dict.get("Resumen_Portafolios")   # Resultados globales
 df_gmvp = df_dict.get("GMVP")
 df_ms = df_dict.get("Max_Sharpe")
 
+# --- Versión de los datos (clave de la caché de figuras) ---
+def version_datos(*dfs):
+    return sum(int(pd.util.hash_pandas_object(d).sum()) for d in dfs if d is not None)
+
+version_libro = version_datos(*df_dict.values())
+
 # --- Formatear valores en pesos ---
 def formato_pesos(x):
     return f"${x:,.0f}"
@@ -58,138 +66,188 @@ else:
     comp_sel = None
 
 if comp_sel is not None:
-    fig1 = px.bar(
-        comp_sel.sort_values("Peso %", ascending=True),
-        x="Peso %", y="Ticker",
-        orientation="h", text="Peso %",
-        title=f"Distribución de Activos - {seleccionado}",
-        color="Peso %", color_continuous_scale=px.colors.sequential.Teal
-    )
-    fig1.update_traces(texttemplate="%{text:.2f}%", textposition="outside")
-    fig1.update_layout(
-        template="plotly_dark",
-        plot_bgcolor="#0E1117", paper_bgcolor="#0E1117",
-        font=dict(color="white")
-    )
-    st.plotly_chart(fig1, use_container_width=True)
+    def construir_composicion():
+        fig1 = px.bar(
+            comp_sel.sort_values("Peso %", ascending=True),
+            x="Peso %", y="Ticker",
+            orientation="h", text="Peso %",
+            title=f"Distribución de Activos - {seleccionado}",
+            color="Peso %", color_continuous_scale=px.colors.sequential.Teal
+        )
+        fig1.update_traces(texttemplate="%{text:.2f}%", textposition="outside")
+        fig1.update_layout(
+            template="plotly_dark",
+            plot_bgcolor="#0E1117", paper_bgcolor="#0E1117",
+            font=dict(color="white")
+        )
+        return fig1
+
+    figuras.mostrar_figura(figuras.spec_figura(("composicion", seleccionado, None, version_libro), construir_composicion))
 else:
     st.warning(f" No hay datos de composición para {seleccionado}")
 
 # --- Comparación Retorno vs Riesgo ---
 st.write("### Comparación Portafolios")
 
-fig2 = go.Figure()
-
-# Todos los portafolios simulados
-fig2.add_trace(go.Scatter(
-    x=df_res["Riesgo Anual"], y=df_res["Retorno Anual"] * 100,
-    mode="markers",
-    marker=dict(size=10, color="#00CFFF", line=dict(color="white", width=0.5)),
-    name="Portafolios Simulados"
-))
+def construir_comparacion():
+    fig2 = go.Figure()
 
-# GMVP
-if "GMVP" in df_res["Portafolio"].values:
-    mvp = df_res[df_res["Portafolio"] == "GMVP"]
+    # Todos los portafolios simulados
     fig2.add_trace(go.Scatter(
-        x=mvp["Riesgo Anual"], y=mvp["Retorno Anual"] * 100,
-        mode="markers", marker=dict(size=14, color="#FF4B4B", symbol="star"),
-        name="GMVP"
+        x=df_res["Riesgo Anual"], y=df_res["Retorno Anual"] * 100,
+        mode="markers",
+        marker=dict(size=10, color="#00CFFF", line=dict(color="white", width=0.5)),
+        name="Portafolios Simulados"
     ))
 
-# Max Sharpe
-if "Max Sharpe" in df_res["Portafolio"].values:
-    ms = df_res[df_res["Portafolio"] == "Max Sharpe"]
+    # GMVP
+    if "GMVP" in df_res["Portafolio"].values:
+        mvp = df_res[df_res["Portafolio"] == "GMVP"]
+        fig2.add_trace(go.Scatter(
+            x=mvp["Riesgo Anual"], y=mvp["Retorno Anual"] * 100,
+            mode="markers", marker=dict(size=14, color="#FF4B4B", symbol="star"),
+            name="GMVP"
+        ))
+
+    # Max Sharpe
+    if "Max Sharpe" in df_res["Portafolio"].values:
+        ms = df_res[df_res["Portafolio"] == "Max Sharpe"]
+        fig2.add_trace(go.Scatter(
+            x=ms["Riesgo Anual"], y=ms["Retorno Anual"] * 100,
+            mode="markers", marker=dict(size=14, color="#00FF9D", symbol="star"),
+            name="Max Sharpe"
+        ))
+
+    # Seleccionado
+    sel = df_res[df_res["Portafolio"] == seleccionado]
     fig2.add_trace(go.Scatter(
-        x=ms["Riesgo Anual"], y=ms["Retorno Anual"] * 100,
-        mode="markers", marker=dict(size=14, color="#00FF9D", symbol="star"),
-        name="Max Sharpe"
+        x=sel["Riesgo Anual"], y=sel["Retorno Anual"] * 100,
+        mode="markers", marker=dict(size=18, color="gold", symbol="star"),
+        name=f"Seleccionado: {seleccionado}"
     ))
 
-# Seleccionado
-sel = df_res[df_res["Portafolio"] == seleccionado]
-fig2.add_trace(go.Scatter(
-    x=sel["Riesgo Anual"], y=sel["Retorno Anual"] * 100,
-    mode="markers", marker=dict(size=18, color="gold", symbol="star"),
-    name=f"Seleccionado: {seleccionado}"
-))
-
-fig2.update_layout(
-    template="plotly_dark",
-    plot_bgcolor="#0E1117", paper_bgcolor="#0E1117",
-    font=dict(color="white"),
-    title="Comparación entre Portafolios",
-    xaxis_title="Riesgo Anual",
-    yaxis=dict(
-        title="Retorno Anual (%)",
-        tickformat=".2f"
+    fig2.update_layout(
+        template="plotly_dark",
+        plot_bgcolor="#0E1117", paper_bgcolor="#0E1117",
+        font=dict(color="white"),
+        title="Comparación entre Portafolios",
+        xaxis_title="Riesgo Anual",
+        yaxis=dict(
+            title="Retorno Anual (%)",
+            tickformat=".2f"
+        )
     )
-)
+    return fig2
 
-st.plotly_chart(fig2, use_container_width=True)
+figuras.mostrar_figura(figuras.spec_figura(("comparacion", seleccionado, None, version_libro), construir_comparacion))
 
 # --- Frontera eficiente desde ZIP ---
 st.write("###  Frontera Eficiente - Markowitz")
 
-# Nuevo ID del archivo ZIP en Google Drive
-FILE_ID = "1XL0NNwTscC4Pxgs0oRZ8ofVwxyuXhajY"
-url_zip = f"https://drive.google.com/uc?id={FILE_ID}"
-
-# Descargar ZIP en memoria
-resp = requests.get(url_zip)
-with zipfile.ZipFile(io.BytesIO(resp.content)) as z:
-    with z.open("frontier.csv") as f:
-        df_frontier = pd.read_csv(f)
-
-# Escalar a anual
-df_frontier["Retorno Anual %"] = df_frontier["Retorno_Diario"] * 252 * 100
-df_frontier["Riesgo Anual %"] = df_frontier["Volatilidad_Diaria"] * (252**0.5) * 100
-
-fig3 = go.Figure()
-
-# Frontera eficiente
-fig3.add_trace(go.Scatter(
-    x=df_frontier["Riesgo Anual %"], y=df_frontier["Retorno Anual %"],
-    mode="lines+markers", line=dict(color="#00CFFF", width=2),
-    name="Frontera Eficiente"
-))
-
-# GMVP
-if "GMVP" in df_res["Portafolio"].values:
-    mvp = df_res[df_res["Portafolio"] == "GMVP"]
-    fig3.add_trace(go.Scatter(
-        x=mvp["Riesgo Anual"] * 100, y=mvp["Retorno Anual"] * 100,
-        mode="markers+text",
-        marker=dict(color="#FF4B4B", size=16, symbol="star"),
-        text=["GMVP"], textposition="top right",
-        name="GMVP"
-    ))
+# frontier.csv desde el ZIP de Drive (precargado en segundo plano)
+precarga.sin_bloquear("frontera", "Cargando la frontera eficiente...")
+df_frontier = cargas.cargar_frontera()
+
+version_frontera = (version_libro, version_datos(df_frontier))
+
+# --- Nube Monte Carlo (precios 2024): por defecto sobre los tickers de GMVP y Max Sharpe ---
+tickers_nube = sorted(set().union(*(
+    set(d["Ticker"].astype(str).str.strip().str.upper())
+    for d in (df_gmvp, df_ms) if d is not None and "Ticker" in d.columns
+)))
+n_nube = st.select_slider(
+    "Portafolios aleatorios en la nube",
+    options=[50_000, 100_000, 200_000, 500_000], value=mc.N_PORTAFOLIOS,
+    format_func=lambda n: f"{n:,}"
+)
 
-# Max Sharpe
-if "Max Sharpe" in df_res["Portafolio"].values:
-    ms = df_res[df_res["Portafolio"] == "Max Sharpe"]
+nube = None
+if not os.path.exists(pp.ARCHIVO_PANEL):
+    precarga.iniciar_precarga().adelantar("panel_precios")
+    st.info("La nube de portafolios aleatorios aparecerá cuando terminen de cargarse los precios 2024.")
+else:
+    version_panel = cargas.asegurar_panel()
+    panel = cargas.cargar_panel(version_panel)
+    tickers_nube = st.multiselect(
+        "Tickers de la nube",
+        options=panel.tickers,
+        default=[t for t in tickers_nube if t in panel],
+        help="Por defecto, los tickers de los portafolios GMVP y Max Sharpe."
+    )
+    if len(tickers_nube) >= 2:
+        nube = (tuple(sorted(tickers_nube)), version_panel, n_nube)
+    else:
+        st.info("Elige al menos 2 tickers para dibujar la nube de portafolios aleatorios.")
+
+def construir_frontera():
+    # Escalar a anual
+    df_frontier["Retorno Anual %"] = df_frontier["Retorno_Diario"] * 252 * 100
+    df_frontier["Riesgo Anual %"] = df_frontier["Volatilidad_Diaria"] * (252**0.5) * 100
+
+    fig3 = go.Figure()
+
+    # Nube de portafolios aleatorios: se agrupa en el servidor y llega como imagen de tamaño fijo
+    if nube is not None:
+        tickers, version, n = nube
+        mu, cov = cargas.cargar_momentos(tickers, version)
+        conteos, centros_riesgo, centros_retorno = mc.nube_aleatoria(mu, cov, n)
+        fig3.add_trace(go.Heatmap(
+            x=centros_riesgo, y=centros_retorno,
+            z=np.where(conteos > 0, np.log10(np.maximum(conteos, 1)), np.nan),
+            customdata=conteos,
+            colorscale="Blues", showscale=False,
+            hovertemplate="Riesgo: %{x:.2f}%<br>Retorno: %{y:.2f}%<br>Portafolios: %{customdata:,.0f}<extra></extra>",
+            name=f"{n:,} portafolios aleatorios"
+        ))
+
+    # Frontera eficiente
     fig3.add_trace(go.Scatter(
-        x=ms["Riesgo Anual"] * 100, y=ms["Retorno Anual"] * 100,
-        mode="markers+text",
-        marker=dict(color="#00FF9D", size=16, symbol="star"),
-        text=["Max Sharpe"], textposition="top right",
-        name="Max Sharpe"
+        x=df_frontier["Riesgo Anual %"], y=df_frontier["Retorno Anual %"],
+        mode="lines+markers", line=dict(color="#00CFFF", width=2),
+        name="Frontera Eficiente"
     ))
 
-# Ajustes de estilo
-fig3.update_layout(
-    template="plotly_dark",
-    plot_bgcolor="#0E1117", paper_bgcolor="#0E1117",
-    font=dict(color="white"),
-    title="Frontera Eficiente - Markowitz",
-    xaxis_title="Riesgo (Volatilidad Anual %)",
-    yaxis=dict(
-        title="Retorno Esperado Anual (%)",
-        tickformat=".2f"
+    # GMVP
+    if "GMVP" in df_res["Portafolio"].values:
+        mvp = df_res[df_res["Portafolio"] == "GMVP"]
+        fig3.add_trace(go.Scatter(
+            x=mvp["Riesgo Anual"] * 100, y=mvp["Retorno Anual"] * 100,
+            mode="markers+text",
+            marker=dict(color="#FF4B4B", size=16, symbol="star"),
+            text=["GMVP"], textposition="top right",
+            name="GMVP"
+        ))
+
+    # Max Sharpe
+    if "Max Sharpe" in df_res["Portafolio"].values:
+        ms = df_res[df_res["Portafolio"] == "Max Sharpe"]
+        fig3.add_trace(go.Scatter(
+            x=ms["Riesgo Anual"] * 100, y=ms["Retorno Anual"] * 100,
+            mode="markers+text",
+            marker=dict(color="#00FF9D", size=16, symbol="star"),
+            text=["Max Sharpe"], textposition="top right",
+            name="Max Sharpe"
+        ))
+
+    # Ajustes de estilo
+    fig3.update_layout(
+        template="plotly_dark",
+        plot_bgcolor="#0E1117", paper_bgcolor="#0E1117",
+        font=dict(color="white"),
+        title="Frontera Eficiente - Markowitz",
+        xaxis_title="Riesgo (Volatilidad Anual %)",
+        yaxis=dict(
+            title="Retorno Esperado Anual (%)",
+            tickformat=".2f"
+        )
     )
-)
+    return fig3
 
-st.plotly_chart(fig3, use_container_width=True)
+figuras.mostrar_figura(figuras.spec_figura(("frontera", None, None, (version_frontera, nube)), construir_frontera))
+if nube is not None:
+    st.caption(f"Nube: {nube[2]:,} portafolios aleatorios (pesos Dirichlet, solo largos) sobre "
+               f"{len(nube[0])} tickers, con retornos y covarianza de los precios 2024 "
+               f"(solo días con cotización real).")
 
 # --- Estilo global para el selectbox ---
 st.markdown("""
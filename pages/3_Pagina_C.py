@@ -1,22 +1,24 @@
 # 3_Pagina_C_Enteras_Format.py
 import streamlit as st
 import pandas as pd
-import numpy as np
 import os
-import zipfile
-import gdown
-import math
+import validacion_portafolio as vp
+import cargas
+import precarga
+import memoria_sesion as memoria
+import riesgo
+import simulacion
+import panel_precios as pp
+import time
+from utilidades import TASA_RF_ANUAL
 
 # -----------------------
 # Configuración
 # -----------------------
-CAPITAL_INICIAL = 500_000_000
-ZIP_URL = "https://drive.google.com/uc?id=1sgshq-1MLrO1oToV8uu-iM4SPnvgT149"
-ZIP_NAME = "acciones_2024.zip"
-CARPETA_DATOS = "Acciones_2024"
-
-# Tasa libre de riesgo: TES cero cupón (Banco de la República, mayo 2025)
-TASA_RF_ANUAL = 0.0925  # 9,25% anual
+CAPITAL_INICIAL = simulacion.CAPITAL_INICIAL
+ZIP_URL = cargas.SIMULACION_ZIP_URL
+ZIP_NAME = cargas.SIMULACION_ZIP
+CARPETA_DATOS = cargas.SIMULACION_CARPETA
 
 # -----------------------
 # Función de formato numérico (estilo europeo/latino)
@@ -27,11 +29,109 @@ def formato_numero(x, decimales=2):
     except:
         return x
 
+# -----------------------
+# Panel de precios: se carga solo después de validar los CSV
+# -----------------------
+def cargar_panel():
+    if not os.path.exists(pp.ARCHIVO_PANEL):
+        precarga.sin_bloquear("panel_precios", "Se están alineando los precios de la simulación. Intenta de nuevo en unos segundos.")
+    return cargas.panel_precios()
+
+
+def fuera_del_panel(panel, tickers):
+    """Problema de validación para los tickers que el panel no tiene (p. ej. CSV sin Adj Close)."""
+    faltantes = [t for t in tickers if t not in panel]
+    return [f"Sin precios en la base de la simulación: {', '.join(faltantes)}."] if faltantes else []
+
 # -----------------------
 # Interfaz
 # -----------------------
 st.title("Simulación de Portafolio")
 
+# Nombre del grupo desde login
+nombre_grupo = st.session_state.get("username", "Grupo_Desconocido")
+
+modo = st.radio("Modo", ["Mi portafolio", "Evaluación por lotes (docente)"], horizontal=True)
+
+# -----------------------
+# Evaluación por lotes: muchos portafolios en una sola pasada
+# -----------------------
+if modo == "Evaluación por lotes (docente)":
+    st.write("""
+    Sube un CSV por grupo (el nombre del archivo será el nombre del grupo) o un único
+    archivo con columnas `Grupo`, `Ticker` y `% del Portafolio`.
+    """)
+    archivos = st.file_uploader(" Sube los CSV de los grupos", type=["csv"], accept_multiple_files=True)
+
+    if st.button("Evaluar lote") and archivos:
+        t0 = time.perf_counter()
+        if not os.path.exists(CARPETA_DATOS):
+            precarga.sin_bloquear("simulacion", "Los precios de la simulación se están descargando. Intenta de nuevo en unos segundos.")
+        cargas.asegurar_simulacion()
+        indice = cargas.cargar_indice_tickers()
+        indice.actualizar(CARPETA_DATOS)
+
+        # Validar todos los grupos antes de leer precios
+        portafolios, problemas_lote = {}, {}
+        for archivo in archivos:
+            try:
+                df_archivo = pd.read_csv(archivo)
+            except Exception as e:
+                problemas_lote[archivo.name] = [f"Error leyendo el CSV: {e}"]
+                continue
+            for grupo, df_grupo in simulacion.separar_lote(df_archivo, archivo.name).items():
+                df_grupo, problemas = vp.validar_portafolio(df_grupo, indice)
+                if grupo in portafolios:
+                    problemas = problemas + ["El grupo aparece más de una vez en el lote."]
+                if problemas:
+                    problemas_lote[grupo] = problemas
+                else:
+                    portafolios[grupo] = df_grupo
+
+        if portafolios:
+            panel = cargar_panel()
+            for grupo in list(portafolios):
+                problemas = fuera_del_panel(panel, portafolios[grupo]["Ticker"])
+                if problemas:
+                    problemas_lote[grupo] = problemas
+                    del portafolios[grupo]
+
+        if problemas_lote:
+            st.warning(f" ⚠️ {len(problemas_lote)} grupo(s) no se evaluaron:")
+            st.markdown("\n".join(f"- **{g}**: {' '.join(p)}" for g, p in problemas_lote.items()))
+        if not portafolios:
+            st.error(" ❌ No hay portafolios válidos para simular.")
+            st.stop()
+
+        # Cada ticker se lee una sola vez para todo el lote
+        pesos = simulacion.matriz_pesos(portafolios)
+        df_precios = panel.tomar(pesos.columns)
+        try:
+            sim = simulacion.simular(pesos, df_precios, CAPITAL_INICIAL)
+        except ValueError as e:
+            st.error(f" ❌ {e}.")
+            st.stop()
+        resultados_lote = simulacion.metricas(sim["valores"], sim["sobrante"], CAPITAL_INICIAL, TASA_RF_ANUAL)
+        memoria.guardar("resultados_lote", resultados_lote)
+        st.success(f" ✅ {len(portafolios)} portafolios evaluados en {time.perf_counter() - t0:.1f} s "
+                   f"({pesos.shape[1]} tickers distintos).")
+
+    resultados_lote = memoria.obtener("resultados_lote")
+    if resultados_lote is not None:
+        resultados_formateado = resultados_lote.sort_values("Sharpe", ascending=False).copy()
+        for col in resultados_formateado.columns[1:]:
+            resultados_formateado[col] = resultados_formateado[col].map(lambda v: formato_numero(v,2))
+
+        st.subheader("Resultados del Lote")
+        st.dataframe(resultados_formateado, hide_index=True)
+        st.download_button(
+            " 📥 Descargar resultados del lote CSV",
+            resultados_lote.to_csv(index=False),
+            file_name="resultados_lote.csv"
+        )
+        st.info("El CSV del lote se puede subir completo en la pestaña Comparativa.")
+    st.stop()
+
 st.write("""
 Sube un CSV con columnas `Ticker` y `% del Portafolio`.  
 Puedes descargar el ejemplo para guiarte en el formato correcto.
@@ -48,10 +148,6 @@ st.download_button(
 )
 
 uploaded = st.file_uploader(" Sube tu CSV (Ticker, % del Portafolio)", type=["csv"])
-df_user = None
-
-# Nombre del grupo desde login
-nombre_grupo = st.session_state.get("username", "Grupo_Desconocido")
 
 # -----------------------
 # Botón finalizar simulación
@@ -63,67 +159,62 @@ if st.button("Finalizar Simulación") and uploaded is not None:
     try:
         df_user = pd.read_csv(uploaded)
         st.success(" ✅ CSV cargado correctamente")
-        # normalizar tickers
-        df_user['Ticker'] = df_user['Ticker'].astype(str).str.strip().str.upper()
-        df_user = df_user[['Ticker', '% del Portafolio']].copy()
-        st.dataframe(df_user)
     except Exception as e:
         st.error(f" ❌ Error leyendo tu CSV: {e}")
         st.stop()
 
-    # Descargar/extraer ZIP si no existe
-    if not os.path.exists(ZIP_NAME):
-        gdown.download(ZIP_URL, ZIP_NAME, quiet=False)
-
     if not os.path.exists(CARPETA_DATOS):
-        with zipfile.ZipFile(ZIP_NAME, 'r') as zip_ref:
-            zip_ref.extractall(".")
+        precarga.sin_bloquear("simulacion", "Los precios de la simulación se están descargando. Intenta de nuevo en unos segundos.")
+    cargas.asegurar_simulacion()
 
     # -----------------------
-    # Leer precios de los tickers
+    # Validación completa del CSV (antes de leer precios)
     # -----------------------
-    precios = {}
-    tickers_validos = []
-
-    for ticker in df_user['Ticker']:
-        file_path = os.path.join(CARPETA_DATOS, f"{ticker}.csv")
-        if os.path.exists(file_path):
-            df_ticker = pd.read_csv(file_path, parse_dates=['Date']).sort_values('Date')
-            df_ticker = df_ticker.set_index('Date')
-            if 'Adj Close' not in df_ticker.columns and 'Adj_Close' in df_ticker.columns:
-                df_ticker['Adj Close'] = df_ticker['Adj_Close']
-            precios[ticker] = df_ticker['Adj Close']
-            tickers_validos.append(ticker)
-        else:
-            st.warning(f" ⚠️ No se encontró archivo para {ticker}, se ignorará.")
-
-    if not precios:
-        st.error(" ❌ No hay tickers válidos para simular.")
+    indice = cargas.cargar_indice_tickers()
+    indice.actualizar(CARPETA_DATOS)  # solo relee los CSV que cambiaron
+    df_user, problemas = vp.validar_portafolio(df_user, indice)
+    if not problemas:
+        panel = cargar_panel()
+        problemas = fuera_del_panel(panel, df_user["Ticker"])
+    if problemas:
+        st.error(" ❌ Tu CSV tiene los siguientes problemas:")
+        st.markdown("\n".join(f"- {p}" for p in problemas))
         st.stop()
+    st.dataframe(df_user)
 
-    df_precios = pd.DataFrame(precios).sort_index()
+    # -----------------------
+    # Precios de los tickers (panel alineado al calendario de negociación)
+    # -----------------------
+    tickers_validos = df_user['Ticker'].tolist()
+    df_precios = panel.tomar(tickers_validos)
 
-    # filtrar df_user a los tickers válidos
-    df_user = df_user[df_user['Ticker'].isin(tickers_validos)].reset_index(drop=True)
+    huecos = panel.huecos(tickers_validos)
+    if huecos.any():
+        detalle = ", ".join(f"{t} ({n})" for t, n in huecos[huecos > 0].items())
+        st.caption(f"ℹ️ Días sin cotización rellenados con el último precio disponible: {detalle}.")
 
     # -----------------------
-    # Distribución monetaria y acciones enteras
+    # Distribución monetaria y acciones enteras (mismo motor que el modo por lotes)
     # -----------------------
     df_user['% del Portafolio'] = df_user['% del Portafolio'].astype(float)
-    df_user['MontoAsignado'] = (df_user["% del Portafolio"] / 100.0) * CAPITAL_INICIAL
-
-    precios_iniciales = df_precios.iloc[0]  # serie indexada por ticker
-    df_user['PrecioInicial'] = df_user['Ticker'].map(precios_iniciales)
-
-    if df_user['PrecioInicial'].isna().any():
-        faltantes = df_user[df_user['PrecioInicial'].isna()]['Ticker'].tolist()
-        st.error(f" ❌ Faltan precios iniciales para: {faltantes}.")
+    pesos = df_user.set_index('Ticker')[['% del Portafolio']].T
+    pesos.index = [nombre_grupo]
+    try:
+        sim = simulacion.simular(pesos, df_precios, CAPITAL_INICIAL)
+    except ValueError as e:
+        st.error(f" ❌ {e}.")
         st.stop()
 
-    df_user['CantidadAcciones'] = np.floor(df_user['MontoAsignado'] / df_user['PrecioInicial']).astype(int)
-    df_user.loc[df_user['CantidadAcciones'] < 0, 'CantidadAcciones'] = 0
+    # El calendario del panel es el de todo el universo: la simulación empieza
+    # el primer día con precio de alguno de los tickers elegidos.
+    inicio = sim['valores'][nombre_grupo].first_valid_index()
+    df_precios = df_precios.loc[inicio:]
+    sim['valores'] = sim['valores'].loc[inicio:]
 
-    df_user['Invertido'] = df_user['CantidadAcciones'] * df_user['PrecioInicial']
+    df_user['MontoAsignado'] = (df_user["% del Portafolio"] / 100.0) * CAPITAL_INICIAL
+    df_user['PrecioInicial'] = df_user['Ticker'].map(sim['precio_inicial'].iloc[0])
+    df_user['CantidadAcciones'] = df_user['Ticker'].map(sim['cantidades'].iloc[0]).astype(int)
+    df_user['Invertido'] = df_user['Ticker'].map(sim['invertido'].iloc[0])
     df_user['Sobrante'] = df_user['MontoAsignado'] - df_user['Invertido']
 
     # Mostrar tabla formateada
@@ -137,14 +228,10 @@ if st.button("Finalizar Simulación") and uploaded is not None:
     # -----------------------
     # Valores diarios del portafolio
     # -----------------------
-    valores_diarios = pd.DataFrame(index=df_precios.index)
-    df_user_index = df_user.set_index('Ticker')
-    for t in tickers_validos:
-        qty = int(df_user_index.loc[t, 'CantidadAcciones']) if t in df_user_index.index else 0
-        valores_diarios[t] = df_precios[t] * qty
+    valores_diarios = df_precios[tickers_validos] * sim['cantidades'].iloc[0]
 
-    capital_sobrante_total = df_user['Sobrante'].sum()
-    valores_diarios['PortafolioTotal'] = valores_diarios.sum(axis=1) + capital_sobrante_total
+    capital_sobrante_total = sim['sobrante'].iloc[0]
+    valores_diarios['PortafolioTotal'] = sim['valores'][nombre_grupo]
 
     valor_inicial = valores_diarios.iloc[0]['PortafolioTotal']
     st.write(f" 💰 Capital inicial configurado: {formato_numero(CAPITAL_INICIAL,2)}")
@@ -162,30 +249,9 @@ if st.button("Finalizar Simulación") and uploaded is not None:
     # Retornos y métricas
     # -----------------------
     retornos_diarios = valores_diarios['PortafolioTotal'].pct_change().fillna(0)
-    rent_anual = (1 + retornos_diarios.mean())**252 - 1
-    riesgo_anual = retornos_diarios.std() * np.sqrt(252)
 
     # Sharpe ajustado: compara contra TES cero cupón 9,25% (tasa libre de riesgo en Colombia)
-    sharpe = (rent_anual - TASA_RF_ANUAL) / riesgo_anual if riesgo_anual > 0 else 0
-
-    dias_arriba = (valores_diarios['PortafolioTotal'] > CAPITAL_INICIAL).sum()
-    dias_abajo = (valores_diarios['PortafolioTotal'] <= CAPITAL_INICIAL).sum()
-    ganancia_prom_arriba = valores_diarios['PortafolioTotal'][valores_diarios['PortafolioTotal'] > CAPITAL_INICIAL].mean()
-    perdida_prom_abajo = valores_diarios['PortafolioTotal'][valores_diarios['PortafolioTotal'] <= CAPITAL_INICIAL].mean()
-    ganancia_total = valores_diarios['PortafolioTotal'].iloc[-1] - CAPITAL_INICIAL
-
-    resultados = pd.DataFrame({
-        "Grupo": [nombre_grupo],
-        "RentabilidadAnualizada": [rent_anual],
-        "Riesgo": [riesgo_anual],
-        "Sharpe": [sharpe],
-        "DiasArriba": [dias_arriba],
-        "DiasAbajo": [dias_abajo],
-        "GananciaPromArriba": [ganancia_prom_arriba],
-        "PerdidaPromAbajo": [perdida_prom_abajo],
-        "GananciaTotal": [ganancia_total],
-        "CapitalSobrante": [capital_sobrante_total]
-    })
+    resultados = simulacion.metricas(sim['valores'], sim['sobrante'], CAPITAL_INICIAL, TASA_RF_ANUAL)
 
     resultados_formateado = resultados.copy()
     for col in resultados_formateado.columns[1:]:
@@ -197,6 +263,22 @@ if st.button("Finalizar Simulación") and uploaded is not None:
     st.caption(f"ℹ️ Nota: El Sharpe se calculó usando una tasa libre de riesgo de {TASA_RF_ANUAL*100:.2f}% anual, "
                "correspondiente a la tasa cero cupón de TES publicada por el Banco de la República (mayo 2025).")
 
+    # -----------------------
+    # Métricas de riesgo adicionales
+    # -----------------------
+    metricas, intervalos = riesgo.metricas_riesgo(
+        valores_diarios['PortafolioTotal'], retornos_diarios, TASA_RF_ANUAL
+    )
+    st.subheader("Métricas de Riesgo")
+    st.dataframe(pd.DataFrame([{k: formato_numero(v, 4) for k, v in metricas.items()}]))
+
+    st.write("Intervalos de confianza del 95% (bootstrap, 5.000 remuestras)")
+    st.dataframe(pd.DataFrame([
+        {"Métrica": nombre, "Inferior": formato_numero(lo, 4), "Superior": formato_numero(hi, 4)}
+        for nombre, (lo, hi) in intervalos.items()
+    ]))
+    st.caption("VaR y CVaR son pérdidas diarias al 95% expresadas como fracción del valor del portafolio.")
+
     # -----------------------
     # Descargar CSV resultados (en bruto, no formateado)
     # -----------------------
@@ -208,3 +290,24 @@ if st.button("Finalizar Simulación") and uploaded is not None:
 
     st.info("✅ Simulación completada. Por favor descarga los resultados para subirlos en la siguiente pestaña.")
 
+    # Solo se conserva lo que se vuelve a mostrar tras una recarga; cuenta contra
+    # el presupuesto de la sesión y pasa a disco si la sesión queda inactiva.
+    memoria.guardar("resultados", resultados)
+
+# -----------------------
+# Última simulación de la sesión (sobrevive a las recargas de la página)
+# -----------------------
+elif memoria.obtener("resultados") is not None:
+    resultados = memoria.obtener("resultados")
+    resultados_formateado = resultados.copy()
+    for col in resultados_formateado.columns[1:]:
+        resultados_formateado[col] = resultados_formateado[col].map(lambda v: formato_numero(v,2))
+
+    st.subheader("Resultados de tu última simulación")
+    st.dataframe(resultados_formateado)
+    st.download_button(
+        " 📥 Descargar resultados CSV",
+        resultados.to_csv(index=False),
+        file_name=f"resultados_{nombre_grupo}.csv"
+    )
+
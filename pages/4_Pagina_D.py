@@ -1,6 +1,8 @@
 import streamlit as st
 import pandas as pd
 import sqlite3
+import memoria_sesion as memoria
+from utilidades import CLAVE_ADMIN
 
 st.title("📊 Resultados de la Simulación")
 
@@ -50,15 +52,15 @@ if archivo is not None:
         st.success("Archivo válido")
         st.dataframe(df)
 
-        grupo = df["Grupo"].iloc[0]  # Nombre del grupo del archivo
+        grupos = df["Grupo"].astype(str).unique().tolist()  # Uno o varios (lote del docente)
 
-        # Validar si ya existe registro para este grupo
-        c.execute("SELECT COUNT(*) FROM resultados WHERE Grupo = ?", (grupo,))
-        existe = c.fetchone()[0]
+        # Validar si ya existe registro para alguno de los grupos
+        c.execute(f"SELECT DISTINCT Grupo FROM resultados WHERE Grupo IN ({','.join('?' * len(grupos))})", grupos)
+        existentes = [fila[0] for fila in c.fetchall()]
 
-        if existe > 0:
-            st.warning(f"⚠️ El grupo **{grupo}** ya subió un archivo. "
-                       f"Debe eliminarlo primero antes de subir uno nuevo.")
+        if existentes:
+            st.warning(f"⚠️ Ya hay resultados de **{', '.join(existentes)}**. "
+                       f"Deben eliminarse primero antes de subir uno nuevo.")
         else:
             if st.button("Subir al tablero"):
                 df[columnas].to_sql("resultados", conn, if_exists="append", index=False)
@@ -114,9 +116,26 @@ st.subheader("Administración")
 password = st.text_input("Ingrese contraseña para borrar todos los resultados", type="password", help="La contraseña no será visible al escribirla.")
 
 if st.button("Borrar todo"):
-    if password == "4825":
+    if password == CLAVE_ADMIN:
         c.execute("DELETE FROM resultados")
         conn.commit()
         st.warning("Todos los resultados han sido eliminados.")
     else:
         st.error("Contraseña incorrecta. No se borraron los datos.")
+
+# -----------------------------
+# Memoria por sesión (solo administrador)
+# -----------------------------
+if password == CLAVE_ADMIN:
+    with st.expander("Memoria por sesión"):
+        df_memoria = memoria.resumen()
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Sesiones", len(df_memoria))
+        col2.metric("En memoria (MB)", f"{df_memoria['Memoria MB'].sum():.1f} / {memoria.PRESUPUESTO_GLOBAL / memoria.MB:.0f}")
+        col3.metric("En disco (MB)", f"{df_memoria['Disco MB'].sum():.1f}")
+        st.caption(f"Presupuesto por sesión: {memoria.PRESUPUESTO_SESION / memoria.MB:.0f} MB. "
+                   f"Las sesiones inactivas más de {memoria.INACTIVIDAD_DISCO_S // 60} minutos pasan a disco.")
+        st.dataframe(df_memoria, hide_index=True)
+        if st.button("Liberar sesiones inactivas"):
+            memoria.limpiar_inactivas()
+            st.rerun()
@@ -0,0 +1,159 @@
+# panel_precios.py
+import os
+import numpy as np
+import pandas as pd
+
+import ingesta
+from datos_acciones import csv_de_carpeta
+
+ARCHIVO_PANEL = "panel_precios.npz"
+
+
+# -----------------------
+# Panel alineado
+# -----------------------
+class PanelPrecios:
+    """
+    Precios de todos los tickers alineados a un calendario maestro de
+    negociación (fechas x tickers). Los días sin cotización de un ticker se
+    rellenan con su último precio; 'cobertura' marca los días con precio real.
+    Antes de la primera cotización de cada ticker el precio queda en NaN.
+    """
+
+    def __init__(self, fechas, tickers, precios, cobertura, versiones=None):
+        self.fechas = pd.DatetimeIndex(fechas)
+        self.tickers = list(tickers)
+        self.precios = precios        # D x T, con forward-fill
+        self.cobertura = cobertura    # D x T, True donde hubo cotización
+        self.versiones = dict(versiones or {})
+        self._columna = {t: i for i, t in enumerate(self.tickers)}
+
+    def __contains__(self, ticker):
+        return ticker in self._columna
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def columnas(self, tickers):
+        faltantes = [t for t in tickers if t not in self._columna]
+        if faltantes:
+            raise KeyError(f"Tickers fuera del panel: {', '.join(faltantes)}")
+        return np.array([self._columna[t] for t in tickers], dtype=np.intp)
+
+    def filas(self, desde=None, hasta=None):
+        inicio = 0 if desde is None else self.fechas.searchsorted(pd.Timestamp(desde), side="left")
+        fin = len(self.fechas) if hasta is None else self.fechas.searchsorted(pd.Timestamp(hasta), side="right")
+        return slice(inicio, fin)
+
+    def tomar(self, tickers, desde=None, hasta=None):
+        """DataFrame fechas x tickers con los precios rellenados (un solo corte del arreglo)."""
+        tickers = list(dict.fromkeys(tickers))
+        filas = self.filas(desde, hasta)
+        return pd.DataFrame(self.precios[filas][:, self.columnas(tickers)],
+                            index=self.fechas[filas], columns=tickers)
+
+    def tomar_cobertura(self, tickers, desde=None, hasta=None):
+        """DataFrame fechas x tickers, True en los días con cotización real."""
+        tickers = list(dict.fromkeys(tickers))
+        filas = self.filas(desde, hasta)
+        return pd.DataFrame(self.cobertura[filas][:, self.columnas(tickers)],
+                            index=self.fechas[filas], columns=tickers)
+
+    def huecos(self, tickers, desde=None, hasta=None):
+        """Días rellenados de cada ticker después de su primera cotización en el rango."""
+        tickers = list(dict.fromkeys(tickers))
+        filas = self.filas(desde, hasta)
+        columnas = self.columnas(tickers)
+        rellenados = ~self.cobertura[filas][:, columnas] & ~np.isnan(self.precios[filas][:, columnas])
+        return pd.Series(rellenados.sum(axis=0), index=tickers)
+
+    def serie(self, ticker):
+        """Precios originales (sin rellenar) de un ticker."""
+        i = self._columna[ticker]
+        return pd.Series(self.precios[self.cobertura[:, i], i], index=self.fechas[self.cobertura[:, i]])
+
+    def guardar(self, archivo=ARCHIVO_PANEL):
+        tmp = archivo + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                fechas=self.fechas.values.astype("datetime64[ns]"),
+                tickers=np.array(self.tickers, dtype=str),
+                precios=self.precios,
+                cobertura=self.cobertura,
+                versiones=np.array([self.versiones.get(t, "") for t in self.tickers], dtype=str),
+            )
+        os.replace(tmp, archivo)
+
+    @classmethod
+    def cargar(cls, archivo=ARCHIVO_PANEL):
+        with np.load(archivo) as datos:
+            tickers = datos["tickers"].tolist()
+            return cls(datos["fechas"], tickers, datos["precios"], datos["cobertura"],
+                       dict(zip(tickers, datos["versiones"].tolist())))
+
+
+# -----------------------
+# Construcción (al ingerir los CSV)
+# -----------------------
+def leer_adj_close(fuente, tamano_bloque=ingesta.BLOQUE_FILAS):
+    """
+    Serie Date -> Adj Close de un CSV de precios (acepta la columna Adj_Close).
+    Se lee por bloques y de cada uno solo se guardan fecha y precio: en memoria
+    queda un bloque más la serie resultante, que es lo que va al panel.
+    """
+    partes = []
+    for bloque in ingesta.iterar_bloques(fuente, ("Date", "Adj Close", "Adj_Close"), tamano_bloque):
+        columna = "Adj Close" if "Adj Close" in bloque.columns else "Adj_Close"
+        fechas = pd.to_datetime(bloque["Date"], errors="coerce")
+        partes.append(pd.Series(bloque[columna].to_numpy(dtype=float), index=fechas))
+    if not partes:
+        raise ValueError(f"{fuente.ticker}: CSV sin filas")
+    serie = pd.concat(partes)
+    serie = serie[serie.index.notna()].dropna()
+    return serie[~serie.index.duplicated(keep="last")].sort_index()
+
+
+def construir_panel(series, versiones=None):
+    """
+    Alinea {ticker: Serie de precios} a la unión de sus fechas y rellena
+    hacia adelante los días sin cotización.
+    """
+    tickers = list(series)
+    fechas = pd.DatetimeIndex(sorted(set().union(*(s.index for s in series.values())))) \
+        if series else pd.DatetimeIndex([])
+    crudos = np.full((len(fechas), len(tickers)), np.nan)
+    for j, t in enumerate(tickers):
+        crudos[fechas.get_indexer(series[t].index), j] = series[t].to_numpy(dtype=float)
+    cobertura = ~np.isnan(crudos)
+
+    # Forward-fill vectorizado: cada celda toma la última fila con precio de su columna
+    ultima = np.where(cobertura, np.arange(len(fechas))[:, None], 0)
+    np.maximum.accumulate(ultima, axis=0, out=ultima)
+    precios = crudos[ultima, np.arange(len(tickers))]
+    return PanelPrecios(fechas, tickers, precios, cobertura, versiones)
+
+
+def actualizar_panel(carpeta, archivo=ARCHIVO_PANEL, tamano_bloque=ingesta.BLOQUE_FILAS):
+    """
+    Construye el panel de 'carpeta' o lo actualiza releyendo solo los CSV
+    nuevos o modificados (por bloques, en un pool de procesos), y lo guarda
+    en 'archivo'. Devuelve los tickers releídos.
+    """
+    fuentes = ingesta.fuentes_carpeta(dict(csv_de_carpeta(carpeta)))
+    previo = PanelPrecios.cargar(archivo) if os.path.exists(archivo) else PanelPrecios([], [], None, None)
+    cambiados = [f for t, f in fuentes.items() if previo.versiones.get(t) != f.version]
+    if not cambiados and set(previo.versiones) == set(fuentes):
+        return []
+
+    series = {t: previo.serie(t) for t in fuentes if t in previo and previo.versiones.get(t) == fuentes[t].version}
+    for fuente, serie, error in ingesta.procesar(cambiados, leer_adj_close, tamano_bloque,
+                                                 procesos=ingesta.procesos_para(len(cambiados))):
+        if isinstance(error, (ValueError, KeyError, pd.errors.EmptyDataError)):
+            continue  # CSV sin Date / Adj Close: queda fuera del panel
+        if error is not None:
+            raise error
+        series[fuente.ticker] = serie
+    series = {t: series[t] for t in fuentes if t in series}  # mismo orden de columnas que la carpeta
+    construir_panel(series, {t: f.version for t, f in fuentes.items()}).guardar(archivo)
+    return [f.ticker for f in cambiados]
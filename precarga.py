@@ -0,0 +1,203 @@
+# precarga.py
+import os
+import json
+import time
+import threading
+import warnings
+from collections import Counter
+import pandas as pd
+import streamlit as st
+
+import cargas
+import datos_acciones as da
+import estadisticas_tickers as et
+
+ARCHIVO_USO = "uso_tickers.json"
+TOP_TICKERS = int(os.environ.get("PRECARGA_TOP_TICKERS", 20))
+
+# Prioridad por defecto de cada tarea (menor = antes). Se puede cambiar con la
+# variable de entorno PRECARGA_PRIORIDADES, p. ej. "libro=0,historicos=5".
+PRIORIDADES = {
+    "libro": 1,
+    "frontera": 2,
+    "historicos": 3,
+    "estadisticas": 4,
+    "tickers_populares": 5,
+    "simulacion": 6,
+    "indice_tickers": 7,
+    "panel_precios": 8,
+}
+
+PENDIENTE, EN_CURSO, LISTA, ERROR = "pendiente", "en curso", "lista", "error"
+
+
+# ================================
+# USO DE TICKERS
+# ================================
+_uso = Counter()
+_candado_uso = threading.Lock()
+
+
+def registrar_uso(ticker):
+    """Cuenta una consulta de 'ticker' para priorizarlo en la próxima precarga."""
+    with _candado_uso:
+        _uso[ticker] += 1
+        if sum(_uso.values()) % 10 == 0:
+            guardar_uso()
+
+
+def guardar_uso():
+    previos = leer_uso()
+    previos.update(_uso)
+    _uso.clear()
+    tmp = ARCHIVO_USO + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(previos, f)
+    os.replace(tmp, ARCHIVO_USO)
+
+
+def leer_uso():
+    if not os.path.exists(ARCHIVO_USO):
+        return Counter()
+    with open(ARCHIVO_USO) as f:
+        return Counter(json.load(f))
+
+
+# ================================
+# TAREAS
+# ================================
+def _tickers_populares():
+    """Carga en caché los tickers más consultados (o, sin historial, los de mayor volumen)."""
+    tickers = cargas.asegurar_historicos()
+    populares = [t for t, _ in leer_uso().most_common(TOP_TICKERS) if t in tickers]
+    if len(populares) < TOP_TICKERS:
+        tabla = et.leer_estadisticas().sort_values("VolumenPromedio", ascending=False)
+        extra = [t for t in tabla["Ticker"] if t in tickers and t not in populares]
+        populares += extra[:TOP_TICKERS - len(populares)]
+    for t in populares:
+        cargas.leer_ticker(tickers[t], da.version_archivo(tickers[t]))
+
+
+TAREAS = {
+    "libro": cargas.cargar_libro_portafolios,
+    "frontera": cargas.cargar_frontera,
+    "historicos": cargas.asegurar_historicos,
+    "estadisticas": lambda: cargas.asegurar_estadisticas(cargas.asegurar_historicos()),
+    "tickers_populares": _tickers_populares,
+    "simulacion": cargas.asegurar_simulacion,
+    "indice_tickers": lambda: (cargas.asegurar_simulacion(), cargas.cargar_indice_tickers()),
+    "panel_precios": cargas.panel_precios,
+}
+
+
+def _prioridades(prioridades=None):
+    resultado = dict(PRIORIDADES)
+    for par in filter(None, os.environ.get("PRECARGA_PRIORIDADES", "").split(",")):
+        nombre, _, valor = par.partition("=")
+        if nombre.strip() not in resultado:
+            continue
+        try:
+            resultado[nombre.strip()] = int(valor)
+        except ValueError:
+            warnings.warn(f"PRECARGA_PRIORIDADES: se ignora '{par}' (la prioridad debe ser un entero).")
+    resultado.update(prioridades or {})
+    return resultado
+
+
+# ================================
+# SERVICIO
+# ================================
+class Precarga:
+    """
+    Ejecuta las tareas de precarga en un hilo en segundo plano, en orden de
+    prioridad, y guarda el estado y la duración de cada una.
+    """
+
+    def __init__(self, prioridades=None):
+        self.prioridades = _prioridades(prioridades)
+        self.estado = {n: PENDIENTE for n in TAREAS}
+        self.duracion = {}
+        self.errores = {}
+        self.inicio = None
+        self.fin = None
+        self._candado = threading.Lock()
+        self._hilo = threading.Thread(target=self._ejecutar, name="precarga", daemon=True)
+
+    def iniciar(self):
+        self.inicio = time.perf_counter()
+        self._hilo.start()
+        return self
+
+    def _tomar(self, nombre):
+        """Marca la tarea como en curso si nadie la ha tomado todavía."""
+        with self._candado:
+            if self.estado[nombre] != PENDIENTE:
+                return False
+            self.estado[nombre] = EN_CURSO
+            return True
+
+    def _correr(self, nombre):
+        t0 = time.perf_counter()
+        try:
+            TAREAS[nombre]()
+            self.estado[nombre] = LISTA
+        except Exception as e:
+            self.estado[nombre] = ERROR
+            self.errores[nombre] = str(e)
+        self.duracion[nombre] = time.perf_counter() - t0
+
+    def _ejecutar(self):
+        for nombre in sorted(TAREAS, key=lambda n: self.prioridades[n]):
+            if self._tomar(nombre):
+                self._correr(nombre)
+        self.fin = time.perf_counter()
+
+    def adelantar(self, nombre):
+        """Ejecuta ya, en otro hilo, una tarea pendiente que una página necesita."""
+        if self._tomar(nombre):
+            threading.Thread(target=self._correr, args=(nombre,), name=f"precarga-{nombre}", daemon=True).start()
+
+    def lista(self, nombre):
+        return self.estado.get(nombre) == LISTA
+
+    @property
+    def terminada(self):
+        return self.fin is not None
+
+    def reporte(self):
+        """Tabla con el estado y la duración (s) de cada tarea."""
+        filas = [{
+            "Tarea": n,
+            "Prioridad": self.prioridades[n],
+            "Estado": self.estado[n],
+            "Segundos": round(self.duracion.get(n, float("nan")), 2),
+            "Error": self.errores.get(n, ""),
+        } for n in sorted(TAREAS, key=lambda n: self.prioridades[n])]
+        return pd.DataFrame(filas)
+
+    def tiempo_total(self):
+        if self.inicio is None:
+            return 0.0
+        return (self.fin or time.perf_counter()) - self.inicio
+
+
+@st.cache_resource(show_spinner=False)
+def iniciar_precarga():
+    """Arranca la precarga una sola vez por proceso y la devuelve."""
+    return Precarga().iniciar()
+
+
+def sin_bloquear(nombre, mensaje):
+    """
+    Si la tarea 'nombre' sigue en precarga, muestra un aviso y detiene la página
+    en vez de esperar la carga en frío. Si ya terminó (o falló) deja continuar:
+    la página usa la caché o carga por su cuenta.
+    """
+    precarga = iniciar_precarga()
+    precarga.adelantar(nombre)
+    if precarga.estado.get(nombre) == EN_CURSO:
+        st.info(mensaje)
+        hechas = sum(e == LISTA for e in precarga.estado.values())
+        st.progress(hechas / len(precarga.estado), text=f"Preparando datos ({hechas}/{len(precarga.estado)})")
+        st.button("Revisar de nuevo")
+        st.stop()
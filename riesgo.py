@@ -0,0 +1,88 @@
+# riesgo.py
+import numpy as np
+from scipy.stats import norm
+
+from utilidades import TASA_RF_ANUAL
+
+DIAS_HABILES = 252
+
+
+def _rent_anual(media_diaria):
+    # Misma convención que la simulación: retorno medio diario compuesto 252 días
+    return (1 + media_diaria) ** DIAS_HABILES - 1
+
+
+def var_cvar_historico(retornos, nivel=0.95):
+    """VaR y CVaR históricos diarios (pérdidas como números positivos)."""
+    q = np.quantile(retornos, 1 - nivel)
+    return -q, -retornos[retornos <= q].mean()
+
+
+def var_cvar_parametrico(retornos, nivel=0.95):
+    """VaR y CVaR diarios suponiendo retornos normales."""
+    mu, sigma = retornos.mean(), retornos.std(ddof=1)
+    z = norm.ppf(1 - nivel)
+    return -(mu + z * sigma), -(mu - sigma * norm.pdf(z) / (1 - nivel))
+
+
+def sortino(retornos, tasa_rf=TASA_RF_ANUAL):
+    """Sortino anual: exceso sobre la tasa libre de riesgo dividido por la desviación a la baja."""
+    rf_diaria = (1 + tasa_rf) ** (1 / DIAS_HABILES) - 1
+    abajo = np.minimum(retornos - rf_diaria, 0)
+    desviacion = np.sqrt((abajo ** 2).mean()) * np.sqrt(DIAS_HABILES)
+    return (_rent_anual(retornos.mean()) - tasa_rf) / desviacion if desviacion > 0 else 0.0
+
+
+def max_drawdown(valores):
+    return (valores / np.maximum.accumulate(valores) - 1).min()
+
+
+def calmar(retornos, valores):
+    dd = max_drawdown(valores)
+    return _rent_anual(retornos.mean()) / abs(dd) if dd < 0 else 0.0
+
+
+def bootstrap(retornos, tasa_rf=TASA_RF_ANUAL, n=5000, confianza=0.95, semilla=0):
+    """
+    Intervalos de confianza bootstrap para la rentabilidad anualizada y el Sharpe.
+    Las 'n' remuestras se generan y evalúan en una sola operación matricial (n x días).
+    """
+    rng = np.random.default_rng(semilla)
+    muestras = retornos[rng.integers(0, len(retornos), size=(n, len(retornos)))]
+    rent = _rent_anual(muestras.mean(axis=1))
+    riesgo = muestras.std(axis=1, ddof=1) * np.sqrt(DIAS_HABILES)
+    sharpe = np.divide(rent - tasa_rf, riesgo, out=np.zeros_like(rent), where=riesgo > 0)
+
+    colas = [(1 - confianza) / 2 * 100, (1 + confianza) / 2 * 100]
+    return {
+        "RentabilidadAnualizada": tuple(np.percentile(rent, colas)),
+        "Sharpe": tuple(np.percentile(sharpe, colas)),
+    }
+
+
+def metricas_riesgo(valores, retornos, tasa_rf=TASA_RF_ANUAL, nivel=0.95, n_bootstrap=5000, semilla=0):
+    """
+    Métricas de riesgo de un portafolio a partir de sus valores diarios
+    (PortafolioTotal) y sus retornos diarios. Los NaN/inf (días antes de que
+    exista el portafolio) se descartan antes de calcular.
+    Devuelve (metricas, intervalos).
+    """
+    valores = np.asarray(valores, dtype=float)
+    retornos = np.asarray(retornos, dtype=float)
+    valores = valores[np.isfinite(valores)]
+    retornos = retornos[np.isfinite(retornos)]
+    if len(valores) < 2 or len(retornos) < 2:
+        raise ValueError("Se necesitan al menos dos días de valores para las métricas de riesgo")
+
+    var_h, cvar_h = var_cvar_historico(retornos, nivel)
+    var_p, cvar_p = var_cvar_parametrico(retornos, nivel)
+    metricas = {
+        f"VaRHistorico{int(nivel*100)}": var_h,
+        f"CVaRHistorico{int(nivel*100)}": cvar_h,
+        f"VaRParametrico{int(nivel*100)}": var_p,
+        f"CVaRParametrico{int(nivel*100)}": cvar_p,
+        "Sortino": sortino(retornos, tasa_rf),
+        "Calmar": calmar(retornos, valores),
+        "MaxDrawdown": max_drawdown(valores),
+    }
+    return metricas, bootstrap(retornos, tasa_rf, n_bootstrap, semilla=semilla)
@@ -0,0 +1,115 @@
+# simulacion.py
+import os
+import numpy as np
+import pandas as pd
+
+from utilidades import TASA_RF_ANUAL
+
+CAPITAL_INICIAL = 500_000_000
+DIAS_HABILES = 252
+
+COLUMNAS_RESULTADOS = [
+    "Grupo", "RentabilidadAnualizada", "Riesgo", "Sharpe", "DiasArriba", "DiasAbajo",
+    "GananciaPromArriba", "PerdidaPromAbajo", "GananciaTotal", "CapitalSobrante"
+]
+
+
+# -----------------------
+# Simulación vectorizada
+# -----------------------
+def simular(pesos, precios, capital=CAPITAL_INICIAL):
+    """
+    Simula varios portafolios a la vez con acciones enteras.
+    pesos: DataFrame grupos x tickers con el % del portafolio (0 si no lo tiene).
+    precios: DataFrame fechas x tickers ya alineado y rellenado (PanelPrecios.tomar);
+    solo puede tener NaN antes de la primera cotización de cada ticker.
+    Devuelve un dict con 'cantidades', 'precio_inicial', 'invertido' (grupos x tickers),
+    'sobrante' (Serie por grupo) y 'valores' (fechas x grupos, PortafolioTotal).
+    """
+    tickers = list(pesos.columns)
+    P = precios[tickers].to_numpy(dtype=float)   # D x T
+    W = pesos.to_numpy(dtype=float) / 100.0      # G x T
+    tiene = W > 0
+    hay_precio = ~np.isnan(P)
+
+    # Un grupo "existe" en las fechas donde cotiza alguno de sus tickers; arranca en la primera
+    activo = (hay_precio.astype(np.int32) @ tiene.T.astype(np.int32)) > 0   # D x G
+    inicio = activo.argmax(axis=0)                                          # G
+    P0 = P[inicio]                                                          # G x T
+
+    faltantes = tiene & np.isnan(P0)
+    if faltantes.any():
+        detalle = {pesos.index[g]: [tickers[t] for t in np.flatnonzero(faltantes[g])]
+                   for g in np.flatnonzero(faltantes.any(axis=1))}
+        raise ValueError(f"Faltan precios iniciales para: {detalle}")
+
+    monto = W * capital
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cantidades = np.where(tiene, np.floor(monto / P0), 0.0)
+    cantidades = np.maximum(cantidades, 0)
+    invertido = np.where(tiene, cantidades * P0, 0.0)
+    sobrante = (monto - invertido).sum(axis=1)
+
+    # Una sola multiplicación matricial valora todos los portafolios en todas las fechas
+    valores = np.nan_to_num(P) @ cantidades.T + sobrante                   # D x G
+    valores[~activo] = np.nan
+
+    return {
+        "cantidades": pd.DataFrame(cantidades.astype(np.int64), index=pesos.index, columns=tickers),
+        "precio_inicial": pd.DataFrame(P0, index=pesos.index, columns=tickers),
+        "invertido": pd.DataFrame(invertido, index=pesos.index, columns=tickers),
+        "sobrante": pd.Series(sobrante, index=pesos.index),
+        "valores": pd.DataFrame(valores, index=precios.index, columns=pesos.index).ffill(),
+    }
+
+
+def metricas(valores, sobrante, capital=CAPITAL_INICIAL, tasa_rf=TASA_RF_ANUAL):
+    """
+    Tabla de resultados (una fila por grupo) a partir de los valores diarios
+    fechas x grupos. Mismas fórmulas que la simulación individual.
+    """
+    retornos = valores.pct_change(fill_method=None)
+    retornos = retornos.mask(valores.notna() & retornos.isna(), 0.0)  # primer día = 0
+
+    rent_anual = (1 + retornos.mean()) ** DIAS_HABILES - 1
+    riesgo_anual = retornos.std() * np.sqrt(DIAS_HABILES)
+    sharpe = ((rent_anual - tasa_rf) / riesgo_anual).where(riesgo_anual > 0, 0.0)
+
+    arriba = valores > capital
+    abajo = valores <= capital
+    return pd.DataFrame({
+        "Grupo": valores.columns,
+        "RentabilidadAnualizada": rent_anual.to_numpy(),
+        "Riesgo": riesgo_anual.to_numpy(),
+        "Sharpe": sharpe.to_numpy(),
+        "DiasArriba": arriba.sum().to_numpy(),
+        "DiasAbajo": abajo.sum().to_numpy(),
+        "GananciaPromArriba": valores.where(arriba).mean().to_numpy(),
+        "PerdidaPromAbajo": valores.where(abajo).mean().to_numpy(),
+        "GananciaTotal": (valores.iloc[-1] - capital).to_numpy(),
+        "CapitalSobrante": sobrante.reindex(valores.columns).to_numpy(),
+    }, columns=COLUMNAS_RESULTADOS)
+
+
+# -----------------------
+# Lotes de portafolios
+# -----------------------
+def separar_lote(df, nombre_archivo):
+    """
+    Divide un CSV del lote en {grupo: DataFrame(Ticker, % del Portafolio)}.
+    Si trae columna Grupo es formato largo; si no, el grupo es el nombre del archivo.
+    """
+    if "Grupo" in df.columns:
+        df = df.assign(Grupo=df["Grupo"].astype(str).str.strip())
+        return {g: d.drop(columns="Grupo").reset_index(drop=True) for g, d in df.groupby("Grupo", sort=False)}
+    return {os.path.splitext(os.path.basename(nombre_archivo))[0]: df}
+
+
+def matriz_pesos(portafolios):
+    """{grupo: df validado} -> DataFrame grupos x tickers con los % (0 donde no hay posición)."""
+    largo = pd.concat(
+        [d.assign(Grupo=g) for g, d in portafolios.items()], ignore_index=True
+    )
+    pesos = largo.pivot_table(index="Grupo", columns="Ticker", values="% del Portafolio",
+                              aggfunc="sum", fill_value=0.0, sort=False)
+    return pesos.reindex(list(portafolios)).astype(float)
@@ -0,0 +1,78 @@
+# test_memoria_sesion.py
+import numpy as np
+import pandas as pd
+import pytest
+
+import memoria_sesion as memoria
+
+
+@pytest.fixture
+def gestor(tmp_path, monkeypatch):
+    """Gestor de memoria vacío, con disco en tmp_path y una sesión controlable."""
+    monkeypatch.setattr(memoria, "CARPETA_DISCO", str(tmp_path))
+    monkeypatch.setattr(memoria, "_sesiones", {})
+    monkeypatch.setattr(memoria, "_actividad", {})
+    sesion = {"id": "a"}
+    monkeypatch.setattr(memoria, "id_sesion", lambda: sesion["id"])
+    return sesion
+
+
+def _resultados_lote(n_grupos):
+    """Tabla con la forma de simulacion.metricas (lo que guarda la página C en modo lote)."""
+    return pd.DataFrame(np.random.default_rng(0).random((n_grupos, 10)),
+                        columns=[f"M{i}" for i in range(10)]).assign(Grupo=[f"G{i}" for i in range(n_grupos)])
+
+
+def _en_memoria(sid="a"):
+    return memoria._memoria(memoria._sesiones[sid])
+
+
+def test_presupuesto_sesion_baja_a_disco_lo_menos_usado(gestor, monkeypatch):
+    lote = _resultados_lote(20_000)
+    resultados = _resultados_lote(1)
+    monkeypatch.setattr(memoria, "PRESUPUESTO_SESION", memoria.tamano_aprox(lote) // 2)
+
+    memoria.guardar("resultados_lote", lote)   # la protegida se queda aunque exceda
+    memoria.guardar("resultados", resultados)
+
+    entradas = memoria._sesiones["a"]
+    assert not entradas["resultados_lote"].en_memoria
+    assert entradas["resultados"].en_memoria
+    assert _en_memoria() <= memoria.PRESUPUESTO_SESION
+    assert _en_memoria() < memoria.tamano_aprox(lote)
+
+    # Al volver a pedirla se trae de disco intacta
+    pd.testing.assert_frame_equal(memoria.obtener("resultados_lote"), lote)
+
+
+def test_presupuesto_global_desaloja_la_sesion_mas_inactiva(gestor, monkeypatch):
+    lote = _resultados_lote(20_000)
+    monkeypatch.setattr(memoria, "PRESUPUESTO_GLOBAL", int(memoria.tamano_aprox(lote) * 1.5))
+    reloj = iter([100.0, 200.0])
+    monkeypatch.setattr(memoria.time, "time", lambda: next(reloj))
+
+    memoria.guardar("resultados_lote", lote)
+    gestor["id"] = "b"
+    memoria.guardar("resultados_lote", lote.copy())
+
+    assert _en_memoria("a") == 0
+    assert _en_memoria("b") == memoria.tamano_aprox(lote)
+
+
+def test_sesiones_inactivas_pasan_a_disco_y_las_abandonadas_se_borran(gestor, monkeypatch, tmp_path):
+    ahora = {"t": 0.0}
+    monkeypatch.setattr(memoria.time, "time", lambda: ahora["t"])
+    memoria.guardar("resultados", _resultados_lote(1_000))
+    gestor["id"] = "b"
+    memoria.guardar("resultados", _resultados_lote(1_000))
+
+    ahora["t"] = memoria.INACTIVIDAD_DISCO_S + 1
+    memoria.tocar()  # la sesión "b" sigue activa
+    assert _en_memoria("a") == 0
+    assert _en_memoria("b") > 0
+
+    ahora["t"] = memoria.INACTIVIDAD_BORRAR_S + 2
+    memoria.limpiar_inactivas()
+    assert "a" not in memoria._sesiones
+    assert not any(p.name.startswith("a_") for p in tmp_path.iterdir())
+    assert _en_memoria("b") == 0
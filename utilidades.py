@@ -3,6 +3,12 @@
 
 import streamlit as st
 
+# Tasa libre de riesgo: TES cero cupón (Banco de la República, mayo 2025)
+TASA_RF_ANUAL = 0.0925  # 9,25% anual
+
+# Contraseña de administración (borrar resultados, actualizar datos compartidos)
+CLAVE_ADMIN = "4825"
+
 def aplicar_estilos(hide_streamlit_nav=True):
     """
     Aplica estilos globales. 
@@ -0,0 +1,227 @@
+# validacion_portafolio.py
+import threading
+import pandas as pd
+
+from datos_acciones import csv_de_carpeta, version_archivo
+
+COLUMNAS_REQUERIDAS = ["Ticker", "% del Portafolio"]
+TOLERANCIA_PESOS = 0.01  # margen en puntos porcentuales para la suma de pesos
+
+
+# -----------------------
+# Índice de tickers
+# -----------------------
+def _borrados(palabra, distancia):
+    """
+    Devuelve todas las variantes de 'palabra' que resultan de borrar hasta
+    'distancia' caracteres (incluida la palabra original).
+    """
+    resultado = {palabra}
+    frontera = {palabra}
+    for _ in range(distancia):
+        nueva = set()
+        for p in frontera:
+            for i in range(len(p)):
+                nueva.add(p[:i] + p[i + 1:])
+        resultado |= nueva
+        frontera = nueva
+    return resultado
+
+
+def _levenshtein(a, b):
+    """Distancia de edición clásica entre dos cadenas cortas."""
+    if len(a) < len(b):
+        a, b = b, a
+    previa = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        actual = [i]
+        for j, cb in enumerate(b, 1):
+            actual.append(min(previa[j] + 1, actual[j - 1] + 1, previa[j - 1] + (ca != cb)))
+        previa = actual
+    return previa[-1]
+
+
+class IndiceTickers:
+    """
+    Índice en memoria de los tickers disponibles.
+    Guarda la cobertura de fechas de cada ticker y un índice de borrados
+    (estilo SymSpell) para sugerir el ticker más cercano ante errores de digitación.
+    Es un recurso compartido entre sesiones: 'candado' protege sus lecturas
+    compuestas frente a 'actualizar'.
+    """
+
+    def __init__(self, cobertura, distancia_max=2, versiones=None):
+        # cobertura: {ticker: (primera_fecha, ultima_fecha)}
+        self.cobertura = dict(cobertura)
+        self.versiones = dict(versiones or {})
+        self.tickers = frozenset(self.cobertura)
+        self.distancia_max = distancia_max
+        self.candado = threading.RLock()
+
+        self._borrados = {}
+        for t in self.tickers:
+            self._indexar(t)
+
+    def _indexar(self, ticker):
+        for b in _borrados(ticker, self.distancia_max):
+            self._borrados.setdefault(b, set()).add(ticker)
+
+    def _desindexar(self, ticker):
+        for b in _borrados(ticker, self.distancia_max):
+            self._borrados.get(b, set()).discard(ticker)
+
+    def _quitar(self, ticker):
+        if ticker in self.tickers:
+            self._desindexar(ticker)
+            self.tickers = self.tickers - {ticker}
+            self.cobertura.pop(ticker, None)
+
+    def __contains__(self, ticker):
+        return ticker in self.tickers
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def sugerencias(self, ticker, maximo=3):
+        """Tickers conocidos más parecidos a 'ticker', ordenados por distancia."""
+        candidatos = set()
+        with self.candado:
+            for b in _borrados(ticker, self.distancia_max):
+                candidatos |= self._borrados.get(b, set())
+        puntuados = []
+        for c in candidatos:
+            d = _levenshtein(ticker, c)
+            if d <= self.distancia_max:
+                puntuados.append((d, c))
+        return [c for _, c in sorted(puntuados)[:maximo]]
+
+    def cubre(self, ticker, fecha):
+        """True si el ticker tiene datos desde 'fecha' (o antes)."""
+        with self.candado:
+            inicio, fin = self.cobertura[ticker]
+        return inicio <= fecha <= fin
+
+    def actualizar(self, carpeta):
+        """
+        Relee la cobertura solo de los CSV nuevos o modificados desde que se
+        construyó el índice y quita los tickers cuyo CSV ya no existe o dejó
+        de tener precios. Devuelve la lista de tickers cambiados.
+        """
+        cambiados = []
+        presentes = set()
+        with self.candado:
+            for ticker, ruta in csv_de_carpeta(carpeta):
+                presentes.add(ticker)
+                version = version_archivo(ruta)
+                if self.versiones.get(ticker) == version:
+                    continue
+                cobertura = _cobertura_csv(ruta)
+                self.versiones[ticker] = version
+                if cobertura is None:
+                    self._quitar(ticker)
+                    continue
+                if ticker not in self.tickers:
+                    self._indexar(ticker)
+                    self.tickers = self.tickers | {ticker}
+                self.cobertura[ticker] = cobertura
+                cambiados.append(ticker)
+
+            for ticker in set(self.versiones) - presentes:
+                self.versiones.pop(ticker)
+                self._quitar(ticker)
+        return cambiados
+
+
+def _cobertura_csv(ruta):
+    """
+    (primera_fecha, ultima_fecha) con precio de un CSV, o None si no tiene
+    fechas o Adj Close (la misma regla que usa el panel de precios).
+    """
+    try:
+        df = pd.read_csv(ruta, usecols=lambda c: c in ("Date", "Adj Close", "Adj_Close"), parse_dates=["Date"])
+    except (ValueError, pd.errors.EmptyDataError):
+        return None
+    columna = "Adj Close" if "Adj Close" in df.columns else "Adj_Close"
+    if columna not in df.columns:
+        return None
+    fechas = df.loc[df[columna].notna(), "Date"].dropna()
+    if fechas.empty:
+        return None
+    return fechas.min(), fechas.max()
+
+
+def construir_indice_tickers(carpeta):
+    """
+    Construye el IndiceTickers leyendo solo la columna Date de cada CSV
+    de 'carpeta' (archivos con nombre <TICKER>.csv).
+    """
+    indice = IndiceTickers({})
+    indice.actualizar(carpeta)
+    return indice
+
+
+# -----------------------
+# Validación del CSV subido
+# -----------------------
+def validar_portafolio(df, indice, fecha_inicio=None):
+    """
+    Valida el CSV completo de un portafolio contra el índice de tickers.
+    Devuelve (df_normalizado, problemas), donde 'problemas' es una lista de
+    mensajes con todos los errores encontrados (vacía si el archivo es válido).
+    """
+    problemas = []
+
+    faltantes = [c for c in COLUMNAS_REQUERIDAS if c not in df.columns]
+    if faltantes:
+        problemas.append(f"Faltan columnas obligatorias: {', '.join(faltantes)}.")
+        return None, problemas
+
+    df = df[COLUMNAS_REQUERIDAS].copy()
+    if df.empty:
+        problemas.append("El archivo no tiene filas.")
+        return None, problemas
+
+    df["Ticker"] = df["Ticker"].astype(str).str.strip().str.upper()
+    pesos = pd.to_numeric(df["% del Portafolio"], errors="coerce")
+
+    # Pesos
+    no_numericos = df.loc[pesos.isna(), "Ticker"].tolist()
+    if no_numericos:
+        problemas.append(f"Pesos vacíos o no numéricos para: {', '.join(no_numericos)}.")
+    negativos = df.loc[pesos < 0, "Ticker"].tolist()
+    if negativos:
+        problemas.append(f"Pesos negativos para: {', '.join(negativos)}.")
+    total = pesos.sum()
+    if not no_numericos and abs(total - 100) > TOLERANCIA_PESOS:
+        problemas.append(f"Los pesos suman {total:.2f}%, deben sumar 100%.")
+
+    # Duplicados
+    duplicados = sorted(df.loc[df["Ticker"].duplicated(), "Ticker"].unique())
+    if duplicados:
+        problemas.append(f"Tickers duplicados: {', '.join(duplicados)}.")
+
+    # Tickers desconocidos y cobertura de fechas
+    # Sin fecha explícita, la simulación arranca en la primera fecha con datos
+    # de alguno de los tickers elegidos: todos deben tener precio ese día.
+    # Se toma el candado para no ver el índice a medio actualizar.
+    sin_cobertura = []
+    with indice.candado:
+        if fecha_inicio is None:
+            conocidos = [indice.cobertura[t][0] for t in df["Ticker"].unique() if t in indice]
+            fecha_inicio = min(conocidos, default=None)
+        for t in df["Ticker"].unique():
+            if t not in indice:
+                sugeridos = indice.sugerencias(t)
+                if sugeridos:
+                    problemas.append(f"Ticker desconocido: {t}. ¿Quisiste decir {', '.join(sugeridos)}?")
+                else:
+                    problemas.append(f"Ticker desconocido: {t}.")
+            elif fecha_inicio is not None and not indice.cubre(t, fecha_inicio):
+                sin_cobertura.append(t)
+    if sin_cobertura:
+        problemas.append(
+            f"Sin datos en la fecha de inicio ({fecha_inicio:%Y-%m-%d}): {', '.join(sin_cobertura)}."
+        )
+
+    df["% del Portafolio"] = pesos
+    return df, problemas